@@ -1,3 +1,9 @@
+import hashlib
+import json
+import os
+import re
+import time
+
 from dotenv import load_dotenv
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
@@ -6,11 +12,41 @@ from langchain_community.utilities import SQLDatabase
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 import streamlit as st
 
-def init_database(user: str, password: str, host: str, port: str, database: str) -> SQLDatabase:
+from query_cache import QueryCache
+from sql_guard import QueryFailed, QueryRejected, run_guarded
+
+SCHEMA_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+SCHEMA_CHECK_INTERVAL = 300  # seconds between checks of the live schema fingerprint
+SQL_CACHE_MAX_BYTES = 8 * 1024 * 1024      # question -> generated SQL
+SQL_CACHE_TTL = 7 * 24 * 3600
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # generated SQL -> result text
+RESULT_CACHE_TTL = 3600
+DATA_VERSION_CHECK_INTERVAL = 30  # seconds between checks of table update times
+HISTORY_RECENT_MESSAGES = 6       # latest messages passed to the prompts verbatim
+HISTORY_FOLD_BATCH = 4            # older messages folded into the rolling summary at a time
+HISTORY_TOKEN_BUDGET = 1500       # cap on history tokens per prompt
+HISTORY_SUMMARY_TOKENS = 600      # part of HISTORY_TOKEN_BUDGET the rolling summary may use
+HISTORY_MESSAGE_TOKENS = 300      # cap on any single verbatim message
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+
+@st.cache_resource
+def init_engine(user: str, password: str, host: str, port: str, database: str) -> Engine:
+    # Shared by the LangChain SQLDatabase and run_guarded
     db_uri = f"mysql+mysqlconnector://{user}:{password}@{host}:{port}/{database}"
-    return SQLDatabase.from_uri(db_uri)
+    return create_engine(db_uri)
+
+@st.cache_resource
+def init_database(_engine: Engine) -> SQLDatabase:
+    return SQLDatabase(_engine)
 
 def generate_schema_summary(schema_raw_text):
     summarization_prompt = f"""
@@ -28,15 +64,36 @@ def generate_schema_summary(schema_raw_text):
     print(summary)
     return summary
 
-def get_schema(db):
+@st.cache_data(ttl=SCHEMA_CHECK_INTERVAL)
+def get_schema_fingerprint(_db):
+    """Hash of the live table/column definitions, used to key the schema caches."""
+    columns = _db.run(
+        "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() ORDER BY TABLE_NAME, ORDINAL_POSITION"
+    )
+    return hashlib.sha256(columns.encode("utf-8")).hexdigest()[:16]
+
+def load_schema_cache(db, fingerprint):
+    """Return {"table_info", "summary"} for this schema, building and saving it on a miss."""
+    path = os.path.join(SCHEMA_CACHE_DIR, f"schema_{fingerprint}.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
     raw_schema = db.get_table_info()
     print("This is the raw schema: ")
     print(raw_schema)
-    return generate_schema_summary(raw_schema)
+    cached = {"table_info": raw_schema, "summary": generate_schema_summary(raw_schema)}
+    os.makedirs(SCHEMA_CACHE_DIR, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(cached, f)
+    os.replace(path + ".tmp", path)
+    return cached
 
-def get_sql_chain(db):  
-    # Use the top-level get_schema function to retrieve the schema summary
-    schema_summary = get_schema(db)
+@st.cache_resource
+def get_sql_chain(_db, fingerprint):
+    # Built once per process and schema; the summary comes from the on-disk cache
+    schema_summary = load_schema_cache(_db, fingerprint)["summary"]
     
     template = """
         You are a data analyst at a company. You are interacting with a user who is asking you questions about the company's database.
@@ -65,21 +122,183 @@ def get_sql_chain(db):
     prompt = ChatPromptTemplate.from_template(template)
     llm = ChatOpenAI(model="gpt-4-0125-preview")
     #llm = ChatOpenAI(model="gpt-3.5-turbo-0125")
+    # Prompt and model are returned separately so the rendered prompt can be measured
     return (
-        RunnablePassthrough.assign(schema=lambda _: schema_summary)
-        | prompt
-        | llm
-        | StrOutputParser()
+        RunnablePassthrough.assign(schema=lambda _: schema_summary) | prompt,
+        llm | StrOutputParser(),
     )
     
-def get_response(user_query: str, db: SQLDatabase, chat_history: list):
-    # Convert `chat_history` to simple text format for compatibility
-    chat_history_text = "\n".join(
-        f"Human: {msg.content}" if isinstance(msg, HumanMessage) else f"AI: {msg.content}"
-        for msg in chat_history
+def count_tokens(text):
+    """Token count for prompt budgeting (about four characters per token without tiktoken)."""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+def truncate_tokens(text, limit):
+    """Cut `text` to at most `limit` tokens, including the " ..." marking the cut."""
+    if count_tokens(text) <= limit:
+        return text
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:max(limit - 1, 0)]) + " ..."
+    return text[: max(limit - 1, 0) * 4] + " ..."
+
+def format_message(msg):
+    return f"Human: {msg.content}" if isinstance(msg, HumanMessage) else f"AI: {msg.content}"
+
+def summarise_history(previous_summary, messages):
+    """Fold `messages` into the running conversation summary with one small LLM call."""
+    prompt = f"""
+    Update the summary of a conversation between a user and a data analyst assistant.
+    Keep names, figures, time ranges and filters the user may refer back to. Be brief.
+
+    Current summary:
+    {previous_summary or "(none)"}
+
+    New messages:
+    {chr(10).join(format_message(m) for m in messages)}
+
+    Updated summary:
+    """
+    summary_llm = ChatGroq(model="mixtral-8x7b-32768", temperature=0)
+    return summary_llm.invoke([HumanMessage(content=prompt)]).content
+
+def build_history_context(chat_history, state):
+    """History text for the prompts: a rolling summary of older turns plus recent messages.
+
+    `state` (the session's st.session_state) keeps the summary and how many
+    messages it covers, so each message is summarised only once. The summary is
+    cut to HISTORY_SUMMARY_TOKENS and the result to HISTORY_TOKEN_BUDGET tokens.
+    Returns (text, token_count).
+    """
+    rolling = state.setdefault("history_summary", {"covers": 0, "text": ""})
+    recent_start = max(len(chat_history) - HISTORY_RECENT_MESSAGES, 0)
+    if recent_start - rolling["covers"] >= HISTORY_FOLD_BATCH:
+        rolling["text"] = summarise_history(rolling["text"], chat_history[rolling["covers"]:recent_start])
+        rolling["covers"] = recent_start
+    recent = chat_history[rolling["covers"]:]
+
+    lines = [truncate_tokens(format_message(m), HISTORY_MESSAGE_TOKENS) for m in recent]
+    summary = f"Summary of earlier conversation: {rolling['text']}" if rolling["text"] else ""
+    summary = truncate_tokens(summary, HISTORY_SUMMARY_TOKENS)
+    budget = HISTORY_TOKEN_BUDGET - count_tokens(summary)
+    # Keep the newest messages that fit (one token each for the line break); the
+    # current question is always kept, and both caps together stay under the budget
+    kept = []
+    for line in reversed(lines):
+        tokens = count_tokens(line) + 1
+        if kept and tokens > budget:
+            break
+        kept.insert(0, line)
+        budget -= tokens
+    text = "\n".join(([summary] if summary else []) + kept)
+    return text, count_tokens(text)
+
+def normalize_question(text):
+    """Lower-case, drop punctuation and collapse whitespace so trivial rephrasings share a key."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+@st.cache_resource
+def get_chat_caches():
+    # Shared by every session in the process
+    return {
+        "sql": QueryCache(max_bytes=SQL_CACHE_MAX_BYTES, ttl=SQL_CACHE_TTL),
+        "result": QueryCache(max_bytes=RESULT_CACHE_MAX_BYTES, ttl=RESULT_CACHE_TTL),
+    }
+
+@st.cache_data(ttl=DATA_VERSION_CHECK_INTERVAL)
+def get_data_version(_db):
+    """Change token for the whole database, used to invalidate cached SQL results."""
+    tables = _db.run(
+        "SELECT TABLE_NAME, UPDATE_TIME, TABLE_ROWS FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() ORDER BY TABLE_NAME"
     )
+    return hashlib.sha256(tables.encode("utf-8")).hexdigest()[:16]
+
+def get_response(user_query: str, db: SQLDatabase, engine: Engine, chat_history: list, timings=None,
+                 on_query=None, history_state=None):
+    """Yield the answer token by token.
+
+    Generated SQL runs on `engine` (the one `db` wraps) through sql_guard.
+    `on_query` is called with the SQL as soon as it is known; `timings` is filled
+    with seconds spent in sql_generation, query_execution and answer_generation,
+    plus time_to_first_token measured from the start of the request, the number
+    of history tokens, and the tokens in each full prompt sent (sql_prompt_tokens
+    is 0 when the SQL came from the cache). `history_state` holds the rolling
+    history summary between calls (defaults to st.session_state).
+    """
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+
+    # Older turns are folded into a rolling summary so prompt size stays flat
+    chat_history_text, history_tokens = build_history_context(
+        chat_history, st.session_state if history_state is None else history_state
+    )
+    timings["history_tokens"] = history_tokens
   
-    sql_chain = get_sql_chain(db)
+    fingerprint = get_schema_fingerprint(db)
+    caches = get_chat_caches()
+
+    # Question -> SQL: the previous human question is the context follow-ups depend on
+    stage = time.perf_counter()
+    previous_questions = [m.content for m in chat_history[:-1] if isinstance(m, HumanMessage)]
+    context = normalize_question(previous_questions[-1]) if previous_questions else ""
+    sql_key = (normalize_question(user_query), context)
+    query = caches["sql"].get(sql_key, fingerprint)
+    timings["sql_prompt_tokens"] = 0
+    if query is None:
+        prompt, model = get_sql_chain(db, fingerprint)
+        prompt_value = prompt.invoke({
+            "question": user_query,
+            "chat_history": chat_history_text,
+        })
+        timings["sql_prompt_tokens"] = count_tokens(prompt_value.to_string())
+        query = model.invoke(prompt_value)
+        caches["sql"].put(sql_key, query, fingerprint)
+    timings["sql_generation"] = time.perf_counter() - stage
+    if on_query is not None:
+        on_query(query)
+
+    # SQL -> result, valid until the data changes
+    stage = time.perf_counter()
+    data_version = get_data_version(db)
+    response = caches["result"].get(query, data_version)
+    if response is None:
+        try:
+            # EXPLAIN budget, enforced LIMIT and statement timeout; large results are summarised
+            response = run_guarded(engine, query)
+            caches["result"].put(query, response, data_version)
+        except QueryRejected as e:
+            response = f"The query was not run because {e}."
+            caches["result"].put(query, response, data_version)
+        except QueryFailed as e:
+            # Not cached: timeouts and connection errors may not happen again
+            response = f"The query failed because {e}."
+    timings["query_execution"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    prompt, model = get_response_chain(db, fingerprint)
+    prompt_value = prompt.invoke({
+        "question": user_query,
+        "chat_history": chat_history_text,  # Pass as joined text
+        "query": query,
+        "response": response,
+    })
+    timings["answer_prompt_tokens"] = count_tokens(prompt_value.to_string())
+    for token in model.stream(prompt_value):
+        if "time_to_first_token" not in timings:
+            timings["time_to_first_token"] = time.perf_counter() - started
+        yield token
+    timings["answer_generation"] = time.perf_counter() - stage
+    timings["total"] = time.perf_counter() - started
+    print("Chat timings: " + ", ".join(
+        f"{k}={v}" if k.endswith("_tokens") else f"{k}={v:.2f}s" for k, v in timings.items()
+    ))
+
+@st.cache_resource
+def get_response_chain(_db, fingerprint):
+    # Built once per process and schema, reusing the cached raw table info
+    table_info = load_schema_cache(_db, fingerprint)["table_info"]
   
     template = """
         You are a data analyst at a company. You are interacting with a user who is asking you questions about the company's database.
@@ -98,20 +317,11 @@ def get_response(user_query: str, db: SQLDatabase, chat_history: list):
   
     llm = ChatGroq(model="mixtral-8x7b-32768", temperature=0)
   
-    chain = (
-        RunnablePassthrough.assign(query=sql_chain).assign(
-            schema=lambda _: db.get_table_info(),
-            response=lambda vars: db.run(vars["query"]),
-        )
-        | prompt
-        | llm
-        | StrOutputParser()
+    # Prompt and model are returned separately so the rendered prompt can be measured
+    return (
+        RunnablePassthrough.assign(schema=lambda _: table_info) | prompt,
+        llm | StrOutputParser(),
     )
-  
-    return chain.invoke({
-        "question": user_query,
-        "chat_history": chat_history_text,  # Pass as joined text
-    })
     
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = [
@@ -124,7 +334,8 @@ st.set_page_config(page_title="AI assistant", page_icon=":speech_balloon:")
 
 st.title("AI assistant")
 
-db = init_database("root","pass","localhost","3306","colorlabels")
+engine = init_engine("root","pass","localhost","3306","colorlabels")
+db = init_database(engine)
 
 st.session_state.db = db
     
@@ -144,10 +355,28 @@ if user_query is not None and user_query.strip() != "":
     with st.chat_message("Human"):
         st.markdown(user_query)
         
-    # Convert chat history to text format before passing to get_response
+    # Stream the answer, showing the generated SQL as soon as it is known
     with st.chat_message("AI"):
-        response = get_response(user_query, st.session_state.db, st.session_state.chat_history)
-        st.markdown(response)
+        timings = {}
+        sql_placeholder = st.empty()
+        response = st.write_stream(get_response(
+            user_query, st.session_state.db, engine, st.session_state.chat_history,
+            timings=timings,
+            on_query=lambda query: sql_placeholder.code(query, language="sql"),
+        ))
+    st.session_state.chat_timings = st.session_state.get("chat_timings", [])[-49:] + [timings]
         
     # Add the AI response to chat history as AIMessage
     st.session_state.chat_history.append(AIMessage(content=response))
+
+with st.sidebar.expander("Cache stats"):
+    for name, cache in get_chat_caches().items():
+        stats = cache.stats()
+        st.write(f"**{name}**: {stats['hits']} hits / {stats['misses']} misses "
+                 f"({stats['hit_rate']:.0%}), {stats['evictions']} evictions, {stats['entries']} entries")
+
+with st.sidebar.expander("Response timings"):
+    if st.session_state.get("chat_timings"):
+        st.dataframe(st.session_state.chat_timings)
+    else:
+        st.write("No questions answered yet.")
@@ -0,0 +1,100 @@
+"""Compare object-string and categorical name columns in purchase/sales frames.
+
+Builds synthetic frames shaped like purchase_report and sales_by_person with
+--rows rows, then reports memory use and the time of the equality filters and
+groupbys the dashboard pages run, once with plain object columns and once
+after conn.encode_categories.
+
+    python benchmarks/bench_categoricals.py --rows 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conn import encode_categories  # noqa: E402
+
+
+def make_purchases(rows, rng):
+    suppliers = np.array([f"SUPPLIER {i:04d} (K) LIMITED" for i in range(400)], dtype=object)
+    items = np.array([f"ITEM {i:05d} - 25KG BAG" for i in range(5000)], dtype=object)
+    return pd.DataFrame({
+        'Supplier Name': suppliers[rng.integers(0, len(suppliers), rows)],
+        'Item Name': items[rng.integers(0, len(items), rows)],
+        'Amount': rng.uniform(0, 500000, rows),
+        'Qty': rng.integers(1, 1000, rows).astype('float64'),
+    })
+
+
+def make_sales(rows, rng):
+    salespersons = np.array([f"SP{i:03d}" for i in range(40)], dtype=object)
+    clients = np.array([f"CLIENT {i:05d} LIMITED" for i in range(5000)], dtype=object)
+    months = np.array([f"{yy}-{mon}" for yy in range(18, 25)
+                       for mon in ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                                   "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")], dtype=object)
+    return pd.DataFrame({
+        'salesperson_name': salespersons[rng.integers(0, len(salespersons), rows)],
+        'client_name': clients[rng.integers(0, len(clients), rows)],
+        'month_year': months[rng.integers(0, len(months), rows)],
+        'total_amount': rng.uniform(-50000, 2000000, rows),
+    })
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def operations(frame):
+    if 'Supplier Name' in frame.columns:
+        supplier = frame['Supplier Name'].iloc[0]
+        return {
+            "filter supplier": lambda: frame[frame['Supplier Name'] == supplier],
+            "groupby supplier": lambda: frame.groupby('Supplier Name', observed=True)['Amount'].sum(),
+            "groupby item": lambda: frame.groupby('Item Name', observed=True).agg(
+                total_amount=('Amount', 'sum'), total_qty=('Qty', 'sum')),
+        }
+    client = frame['client_name'].iloc[0]
+    return {
+        "filter client": lambda: frame[frame['client_name'] == client],
+        "groupby salesperson": lambda: frame.groupby('salesperson_name', observed=True)['total_amount'].sum(),
+        "groupby client+month": lambda: frame.groupby(['client_name', 'month_year'], observed=True)['total_amount'].sum(),
+    }
+
+
+def mb(frame):
+    return frame.memory_usage(index=True, deep=True).sum() / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Object vs categorical name column benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+
+    for name, plain in (("purchases", make_purchases(args.rows, rng)), ("sales", make_sales(args.rows, rng))):
+        start = time.perf_counter()
+        encoded = encode_categories(plain.copy())
+        encode_s = time.perf_counter() - start
+        print(f"{name}: {args.rows:,} rows")
+        print(f"  {'memory MB':<24}{mb(plain):>10.1f}{mb(encoded):>10.1f}{mb(plain) / mb(encoded):>9.1f}x")
+        print(f"  {'encode s':<24}{'':>10}{encode_s:>10.3f}")
+        for op, fn in operations(plain).items():
+            before = timed(fn, args.repeat)
+            after = timed(operations(encoded)[op], args.repeat)
+            print(f"  {op + ' s':<24}{before:>10.3f}{after:>10.3f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare row-by-row PO Date parsing with date_utils.parse_dates.
+
+Builds a synthetic PO Date column of --rows values drawn from a few thousand
+distinct dates written in the formats seen in purchase_report, then times the
+old chain (ISO regex extract and to_datetime over every row, then one
+to_datetime pass per remaining format) against parse_dates, which parses
+each distinct value once.
+
+    python benchmarks/bench_date_parsing.py --rows 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from date_utils import ISO_DATE_IN_TEXT, PO_DATE_FORMATS, parse_dates  # noqa: E402
+
+WRITERS = [
+    lambda d: d.strftime('%Y-%m-%d'),
+    lambda d: d.strftime('%d-%m-%Y'),
+    lambda d: d.strftime('%d/%m/%Y'),
+    lambda d: d.strftime('%Y-%m-%d 00:00:00'),
+    lambda d: f" {d.strftime('%Y-%m-%d')} ",
+    lambda d: 'N/A',
+]
+
+
+def make_column(rows, distinct, seed=42):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range('2019-01-01', periods=distinct, freq='D')
+    pool = [WRITERS[i % len(WRITERS)](day) for i, day in enumerate(days)]
+    return pd.Series(np.array(pool, dtype=object)[rng.integers(0, len(pool), rows)], name='PO Date')
+
+
+def old_chain(values):
+    text = values.astype(str).str.strip()
+    parsed = pd.to_datetime(text.str.extract(ISO_DATE_IN_TEXT)[0], format='%Y-%m-%d', errors='coerce')
+    for fmt in ('%d-%m-%Y', '%d/%m/%Y'):
+        todo = parsed.isna()
+        parsed[todo] = pd.to_datetime(text[todo], format=fmt, errors='coerce')
+    return parsed
+
+
+def best_of(fn, values, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(values)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PO Date parsing benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--distinct", type=int, default=2000, help="distinct dates in the column")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    values = make_column(args.rows, args.distinct)
+    print(f"{args.rows:,} rows, {values.nunique():,} distinct values")
+
+    old, old_result = best_of(old_chain, values, args.repeat)
+    new, new_result = best_of(lambda v: parse_dates(v, PO_DATE_FORMATS), values, args.repeat)
+    print(f"{'old chain':<14}{old:>10.3f}s  {old_result.notna().sum():>12,} parsed")
+    print(f"{'parse_dates':<14}{new:>10.3f}s  {new_result.notna().sum():>12,} parsed  ({old / new:.1f}x)")
+
+    agree = (old_result.dt.normalize() == new_result.dt.normalize()) | old_result.isna()
+    print(f"Rows parsed by both that disagree: {(~agree).sum():,}")
+
+    stats = {}
+    parse_dates(values, PO_DATE_FORMATS, stats=stats)
+    print("Rows parsed per format:")
+    for name, counts in stats.items():
+        if isinstance(counts, dict):
+            print(f"  {name:<22}{counts['parsed']:>12,} parsed  {counts['failed']:>12,} left")
+    print(f"  unique values {stats['unique_values']:,}, unparsed rows {stats['unparsed']:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Compare STR_TO_DATE(month_year) scans with the indexed `period` column.
+
+Builds two scratch copies of the sales_by_person layout on a test MySQL/MariaDB
+server, one without and one with the period column and indexes from
+migrations/001_sales_period.sql, grows them to --rows rows and times the
+queries MySQLDatabase runs before and after the migration.
+
+    python benchmarks/bench_sales_period.py --host 127.0.0.1 --user root \\
+        --password pass --database bench --rows 10000000
+
+Do not point this at the production database: it creates and drops tables.
+"""
+import argparse
+import random
+import statistics
+import time
+
+import mysql.connector
+
+SEED_ROWS = 10000
+MONTHS = [f"{yy}-{mon}" for yy in range(18, 25)
+          for mon in ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                      "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")]
+
+SCAN_TABLE = "bench_sales_scan"
+INDEXED_TABLE = "bench_sales_period"
+
+QUERIES = {
+    "client trend": (
+        f"""SELECT month_year, SUM(total_amount) FROM {SCAN_TABLE}
+            WHERE client_name = %(client)s GROUP BY month_year
+            ORDER BY STR_TO_DATE(month_year, '%y-%b')""",
+        f"""SELECT DATE_FORMAT(period, '%y-%b'), SUM(total_amount) FROM {INDEXED_TABLE}
+            WHERE client_name = %(client)s GROUP BY period ORDER BY period""",
+    ),
+    "salesperson trend": (
+        f"""SELECT month_year, SUM(total_amount) FROM {SCAN_TABLE}
+            WHERE salesperson_name = %(salesperson)s GROUP BY month_year
+            ORDER BY STR_TO_DATE(month_year, '%y-%b')""",
+        f"""SELECT DATE_FORMAT(period, '%y-%b'), SUM(total_amount) FROM {INDEXED_TABLE}
+            WHERE salesperson_name = %(salesperson)s GROUP BY period ORDER BY period""",
+    ),
+    "sales in year": (
+        f"""SELECT COUNT(*), SUM(total_amount) FROM {SCAN_TABLE}
+            WHERE YEAR(STR_TO_DATE(month_year, '%y-%b')) = %(year)s""",
+        f"""SELECT COUNT(*), SUM(total_amount) FROM {INDEXED_TABLE}
+            WHERE period >= %(year_start)s AND period < %(year_end)s""",
+    ),
+}
+
+
+def build_tables(cursor, rows):
+    rng = random.Random(42)
+    salespersons = [f"SP{i:03d}" for i in range(40)]
+    clients = [f"CLIENT {i:05d} LIMITED" for i in range(5000)]
+    seed = [(rng.choice(salespersons), rng.choice(clients), rng.choice(MONTHS),
+             round(rng.uniform(-50000, 2000000), 5)) for _ in range(SEED_ROWS)]
+
+    for table in (SCAN_TABLE, INDEXED_TABLE):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute(f"""
+            CREATE TABLE {table} (
+                salesperson_name VARCHAR(10),
+                client_name VARCHAR(52),
+                month_year VARCHAR(6),
+                total_amount DECIMAL(12,5)
+            )""")
+    cursor.executemany(f"INSERT INTO {SCAN_TABLE} VALUES (%s, %s, %s, %s)", seed)
+    count = SEED_ROWS
+    while count < rows:
+        batch = min(count, rows - count)
+        cursor.execute(f"INSERT INTO {SCAN_TABLE} SELECT * FROM {SCAN_TABLE} LIMIT {batch}")
+        count += batch
+        print(f"  {count:,} rows", end="\r")
+    print()
+
+    cursor.execute(f"""
+        CREATE TABLE {INDEXED_TABLE}_tmp AS
+        SELECT salesperson_name, client_name, month_year,
+               STR_TO_DATE(CONCAT(month_year, '-01'), '%y-%b-%d') AS period, total_amount
+        FROM {SCAN_TABLE}""")
+    cursor.execute(f"DROP TABLE {INDEXED_TABLE}")
+    cursor.execute(f"RENAME TABLE {INDEXED_TABLE}_tmp TO {INDEXED_TABLE}")
+    cursor.execute(f"CREATE INDEX idx_client_period ON {INDEXED_TABLE} (client_name, period, total_amount)")
+    cursor.execute(f"CREATE INDEX idx_salesperson_period ON {INDEXED_TABLE} (salesperson_name, period, total_amount)")
+    cursor.execute(f"CREATE INDEX idx_period ON {INDEXED_TABLE} (period)")
+    cursor.execute(f"ANALYZE TABLE {SCAN_TABLE}, {INDEXED_TABLE}")
+    cursor.fetchall()
+    return seed[0][0], seed[0][1]
+
+
+def time_query(cursor, query, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def examined_rows(cursor, query, params):
+    cursor.execute("EXPLAIN " + query, params)
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    return max(int(r[columns.index("rows")] or 0) for r in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STR_TO_DATE scan vs. indexed period benchmark")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="bench")
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables afterwards")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host=args.host, port=args.port, user=args.user,
+                                   password=args.password, database=args.database,
+                                   autocommit=True)
+    cursor = conn.cursor(buffered=True)
+    print(f"Building {args.rows:,}-row tables ...")
+    salesperson, client = build_tables(cursor, args.rows)
+    params = {"client": client, "salesperson": salesperson, "year": 2023,
+              "year_start": "2023-01-01", "year_end": "2024-01-01"}
+
+    print(f"{'query':<20}{'scan s':>10}{'index s':>10}{'speedup':>10}{'scan rows':>14}{'index rows':>14}")
+    for name, (scan_query, index_query) in QUERIES.items():
+        scan = time_query(cursor, scan_query, params, args.repeat)
+        indexed = time_query(cursor, index_query, params, args.repeat)
+        print(f"{name:<20}{scan:>10.3f}{indexed:>10.3f}{scan / indexed:>9.1f}x"
+              f"{examined_rows(cursor, scan_query, params):>14,}"
+              f"{examined_rows(cursor, index_query, params):>14,}")
+
+    if not args.keep:
+        cursor.execute(f"DROP TABLE {SCAN_TABLE}, {INDEXED_TABLE}")
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
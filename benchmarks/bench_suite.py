@@ -0,0 +1,293 @@
+"""Time MySQLDatabase methods, cleaning steps and page aggregations on synthetic data.
+
+For each size in --sizes the suite generates sales_by_person and raw
+purchase_report data (see synthetic_data.py), loads it into a scratch
+MySQL/MariaDB database, applies migrations/ to it and then times:
+
+  fetch    every MySQLDatabase loader the pages call, with the result cache
+           cleared before each run (plus a cached run of the heavy loaders)
+  clean    the pandas cleaning steps: date parsing, numeric cleaning,
+           categorical encoding, row indexing
+  page     the aggregation block of each dashboard page, calling the same
+           helpers the pages do (conn.supplier_comparison, downsample_trend)
+
+Each case reports p50/p95/p99 latency over --repeat runs and peak traced
+memory of one extra run. Results are written to a JSON file; pass an earlier
+one as --compare to flag cases whose p50 got slower by more than --threshold.
+
+    python benchmarks/bench_suite.py --host 127.0.0.1 --user root --password pass \\
+        --database colorlabels_bench --sizes 10k,1m
+    python benchmarks/bench_suite.py --no-db --sizes 10k,1m,10m --compare benchmarks/results/base.json
+
+SQLite cannot stand in for MySQL here: the loaders rely on DATE_FORMAT,
+information_schema and the triggers in migrations/. Use --no-db to run only
+the pandas cases. Never point --database at production: every table in it is
+dropped and recreated.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import mysql.connector
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from conn import (IndexedFrame, MySQLDatabase, PURCHASE_INDEX_COLUMNS, clean_purchase_data,  # noqa: E402
+                  encode_categories, fix_po_date, period_from_month_year, supplier_comparison)
+from downsampling import downsample_trend  # noqa: E402
+from import_sales import parse_amount  # noqa: E402
+from migrate import migrate  # noqa: E402
+from synthetic_data import purchase_frame, sales_frame  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+INSERT_BATCH = 10000
+
+SALES_TABLE = """
+    CREATE TABLE sales_by_person (
+        salesperson_name VARCHAR(10),
+        client_name VARCHAR(52),
+        month_year VARCHAR(6),
+        total_amount DECIMAL(18,5)
+    )"""
+PURCHASE_TABLE = """
+    CREATE TABLE purchase_report (
+        `PO No` VARCHAR(20),
+        `PO Date` VARCHAR(30),
+        `Supplier Name` VARCHAR(100),
+        `Item Name` VARCHAR(150),
+        `Qty` VARCHAR(20),
+        `Rate` VARCHAR(20),
+        `Amount` VARCHAR(20),
+        `Pending Qty` VARCHAR(20)
+    )"""
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def load_database(args, sales, purchases):
+    """Recreate the scratch database with the generated rows and run the migrations on it."""
+    conn = mysql.connector.connect(host=args.host, port=args.port, user=args.user,
+                                   password=args.password, autocommit=True)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+    cursor.execute(f"CREATE DATABASE `{args.database}`")
+    cursor.execute(f"USE `{args.database}`")
+    for ddl, table, frame in ((SALES_TABLE, "sales_by_person", sales), (PURCHASE_TABLE, "purchase_report", purchases)):
+        cursor.execute(ddl)
+        columns = ", ".join(f"`{c}`" for c in frame.columns)
+        placeholders = ", ".join(["%s"] * len(frame.columns))
+        rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == INSERT_BATCH:
+                cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", batch)
+                batch = []
+        if batch:
+            cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", batch)
+    cursor.close()
+    conn.close()
+
+    db = MySQLDatabase(host=args.host, port=args.port, user=args.user,
+                       password=args.password, database=args.database)
+    migrate(db=db)
+    db.refresh_sales_rollup(full=True)
+    return db
+
+
+def fetch_cases(db, sales):
+    client = sales['client_name'].iloc[0]
+    salesperson = sales['salesperson_name'].iloc[0]
+    cold = {
+        "load_sales_data": db.load_sales_data,
+        "fetch_sales_filter_options": db.fetch_sales_filter_options,
+        "fetch_monthly_sales_trend": db.fetch_monthly_sales_trend,
+        "fetch_top_salespersons": db.fetch_top_salespersons,
+        "fetch_top_clients": db.fetch_top_clients,
+        "fetch_sales_kpis": db.fetch_sales_kpis,
+        "fetch_sales_in_year": lambda: db.fetch_sales_in_year(2023),
+        "fetch_client_profile": lambda: db.fetch_client_profile(client),
+        "fetch_salesperson_profile": lambda: db.fetch_salesperson_profile(salesperson),
+        "load_purchase_data": db.load_purchase_data,
+        "load_clean_purchase_data": db.load_clean_purchase_data,
+        "load_purchase_index": db.load_purchase_index,
+    }
+    cases = {name: (db.clear_cache, lambda _, fn=fn: fn()) for name, fn in cold.items()}
+    for name in ("fetch_sales_kpis", "load_clean_purchase_data", "load_purchase_index"):
+        cases[f"{name} cached"] = (lambda: None, lambda _, fn=cold[name]: fn())
+    return cases
+
+
+def clean_cases(sales, purchases):
+    clean = encode_categories(clean_purchase_data(fix_po_date(purchases.copy())))
+    return {
+        "fix_po_date": (lambda: purchases.copy(), fix_po_date),
+        "clean_purchase_data": (lambda: purchases.copy(), clean_purchase_data),
+        "encode_categories (purchases)": (lambda: clean.astype({c: object for c in PURCHASE_INDEX_COLUMNS}),
+                                          encode_categories),
+        "encode_categories (sales)": (lambda: sales.copy(), encode_categories),
+        "period_from_month_year": (lambda: sales['month_year'], period_from_month_year),
+        "parse_amount": (lambda: purchases['Amount'], parse_amount),
+        "IndexedFrame": (lambda: clean, lambda frame: IndexedFrame(frame, PURCHASE_INDEX_COLUMNS)),
+    }, clean
+
+
+def page_purchase_analysis(index, supplier, item):
+    data = index.select(**{'Supplier Name': supplier, 'Item Name': item})
+    kpis = (data['Amount'].sum(), data['Pending Qty'].sum(), data['Rate'].mean())
+    return kpis, downsample_trend(data, 'PO Date', 'Amount')
+
+
+def page_item_purchase(index, item):
+    data = index.select(**{'Item Name': item})
+    kpis = (data['Qty'].sum(), data['Pending Qty'].sum(), data['Amount'].sum(), data['Rate'].mean())
+    return kpis, downsample_trend(data, 'PO Date', 'Amount')
+
+
+def page_supplier_profile(index, supplier):
+    data = index.select(**{'Supplier Name': supplier})
+    kpis = (data['Qty'].sum(), data['Pending Qty'].sum(), data['Amount'].sum(), data['Rate'].mean())
+    # The page reads the comparison from the shared dataset; this is the build it triggers
+    return kpis, downsample_trend(data, 'PO Date', 'Amount'), supplier_comparison(index.frame)
+
+
+def page_supplier_comparison(data, suppliers):
+    start, end = data['PO Date'].min(), data['PO Date'].max()
+    filtered = data[data['Supplier Name'].isin(suppliers) & (data['PO Date'] >= start) & (data['PO Date'] <= end)]
+    trends = downsample_trend(filtered.rename(columns={'Amount': 'total_amount'}), 'PO Date', 'total_amount',
+                              group_column='Supplier Name', start=start, end=end)
+    return supplier_comparison(filtered), trends
+
+
+def page_cases(clean):
+    index = IndexedFrame(clean, PURCHASE_INDEX_COLUMNS)
+    supplier = index.values('Supplier Name')[0]
+    item = index.values('Item Name')[0]
+    return {
+        "3 purchase analysis (all)": (lambda: index, lambda i: page_purchase_analysis(i, None, None)),
+        "3 purchase analysis (supplier+item)": (lambda: index, lambda i: page_purchase_analysis(i, supplier, item)),
+        "4 item purchase": (lambda: index, lambda i: page_item_purchase(i, item)),
+        "5 supplier profile": (lambda: index, lambda i: page_supplier_profile(i, supplier)),
+        "6 supplier comparison": (lambda: clean, lambda d: page_supplier_comparison(d, index.values('Supplier Name')[:3])),
+    }
+
+
+def measure(setup, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    arg = setup()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "runs": repeat,
+        "p50_s": float(np.percentile(timings, 50)),
+        "p95_s": float(np.percentile(timings, 95)),
+        "p99_s": float(np.percentile(timings, 99)),
+        "mean_s": float(np.mean(timings)),
+        "peak_mb": peak / 1024 / 1024,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Print p50 changes against a previous run; return the number of regressions."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["rows"], r["group"], r["case"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (threshold {threshold:.0%}):")
+    for r in results:
+        before = baseline.get((r["rows"], r["group"], r["case"]))
+        if before is None or before["p50_s"] == 0:
+            continue
+        change = r["p50_s"] / before["p50_s"] - 1
+        flag = "REGRESSION" if change > threshold else ""
+        regressions += bool(flag)
+        print(f"  {r['rows']:>10,} {r['group']:<6}{r['case']:<40}{before['p50_s']:>10.4f}{r['p50_s']:>10.4f}"
+              f"{change:>+9.1%}  {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MySQLDatabase and page benchmark suite")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="colorlabels_bench", help="scratch database, dropped and recreated")
+    parser.add_argument("--sizes", default="10k", help="comma-separated row counts, e.g. 10k,1m,10m")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-db", action="store_true", help="skip loading MySQL and the fetch cases")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown reported as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for rows in (parse_size(s) for s in args.sizes.split(",")):
+        print(f"\n{rows:,} rows: generating ...")
+        sales, purchases = sales_frame(rows), purchase_frame(rows)
+        groups = []
+        if not args.no_db:
+            print("  loading and migrating the scratch database ...")
+            db = load_database(args, sales, purchases)
+            groups.append(("fetch", fetch_cases(db, sales)))
+        cleaning, clean = clean_cases(sales, purchases)
+        groups.append(("clean", cleaning))
+        groups.append(("page", page_cases(clean)))
+
+        print(f"  {'group':<6}{'case':<40}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}{'peak MB':>10}")
+        for group, cases in groups:
+            for case, (setup, fn) in cases.items():
+                stats = measure(setup, fn, args.repeat)
+                results.append({"rows": rows, "group": group, "case": case, **stats})
+                print(f"  {group:<6}{case:<40}{stats['p50_s']:>10.4f}{stats['p95_s']:>10.4f}"
+                      f"{stats['p99_s']:>10.4f}{stats['peak_mb']:>10.1f}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+            "repeat": args.repeat,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
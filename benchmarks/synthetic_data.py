@@ -0,0 +1,168 @@
+"""Synthetic sales_by_person and purchase_report data at any size.
+
+Sales rows reuse the salesperson and client names and the amount distribution
+of dumps/Normalized_Sales_Data_for_DB_Import.csv (falling back to made-up
+names without it); each client belongs to one salesperson and appears once per
+active month, so (salesperson_name, client_name, month_year) stays unique as in
+migrations/003. Purchase rows look like the raw purchase_report export:
+comma-formatted amounts and quantities with blanks and junk, and PO dates in
+the mixed formats date_utils.PO_DATE_FORMATS handles plus unparseable ones.
+
+    python benchmarks/synthetic_data.py --rows 1000000 --out /tmp/synthetic
+
+writes sales_by_person.csv (loadable with import_sales.py) and
+purchase_report.csv.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+DUMP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    "dumps", "Normalized_Sales_Data_for_DB_Import.csv")
+
+MONTHS = [f"{yy}-{mon}" for yy in range(18, 25)
+          for mon in ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                      "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")]
+ACTIVE_MONTHS = 60  # months each synthetic client buys in; must not exceed len(MONTHS)
+
+SUPPLIER_WORDS = ["KENYA", "AFRICA", "GLOBAL", "UNITED", "PACIFIC", "CROWN", "PRIME",
+                  "STAR", "DELTA", "EAGLE", "SUMMIT", "HIGHLAND", "COAST", "RIFT", "LAKE"]
+SUPPLIER_KINDS = ["PAPERS", "INKS", "CHEMICALS", "PACKAGING", "POLYMERS", "LABELS", "TRADERS"]
+ITEM_KINDS = ["PRINTING INK", "KRAFT PAPER", "ADHESIVE", "BOPP FILM", "SOLVENT", "CORE",
+              "THERMAL ROLL", "VARNISH", "PLATE", "RIBBON"]
+ITEM_UNITS = ["1KG", "5KG", "20KG", "25KG BAG", "200L DRUM", "ROLL", "REAM", "PCS"]
+
+# Share of PO Date values written each way; the rest cannot be parsed
+PO_DATE_STYLES = [
+    ("%Y-%m-%d", 0.70),
+    ("%d-%m-%Y", 0.10),
+    ("%d/%m/%Y", 0.08),
+    ("%Y-%m-%d %H:%M:%S", 0.07),
+    ("PO %Y-%m-%d", 0.03),
+]
+JUNK_DATES = ["", "N/A", "TBA", "31-31-2023"]
+JUNK_NUMBERS = ["", "N/A", "-"]
+
+
+def _dump_sales():
+    if not os.path.exists(DUMP):
+        return None
+    return pd.read_csv(DUMP)
+
+
+def _names(base, count, width):
+    """`count` distinct names: `base` first, then numbered copies fitting in `width` characters."""
+    base = list(dict.fromkeys(base))
+    names = base[:count]
+    k = 2
+    while len(names) < count:
+        suffix = f" #{k}"
+        names.extend(name[:width - len(suffix)] + suffix for name in base[:count - len(names)])
+        k += 1
+    return np.array(names, dtype=object)
+
+
+def sales_frame(rows, seed=0):
+    """sales_by_person rows: salesperson_name, client_name, month_year, total_amount."""
+    rng = np.random.default_rng(seed)
+    dump = _dump_sales()
+    if dump is not None:
+        weights = dump['salesperson_name'].value_counts(normalize=True)
+        salespersons, sp_weights = weights.index.to_numpy(dtype=object), weights.to_numpy()
+        client_base = dump['client_name'].dropna().tolist()
+        amounts = dump['total_amount'].dropna().to_numpy()
+    else:
+        salespersons = np.array([f"SP{i:03d}" for i in range(20)], dtype=object)
+        sp_weights = np.full(len(salespersons), 1 / len(salespersons))
+        client_base = [f"CLIENT {i:05d} LIMITED" for i in range(500)]
+        amounts = rng.lognormal(11.5, 1.5, 5000)
+
+    n_clients = -(-rows // ACTIVE_MONTHS)
+    clients = _names(client_base, n_clients, 52)
+    client_sp = rng.choice(salespersons, size=n_clients, p=sp_weights)
+    client_start = rng.integers(0, len(MONTHS), n_clients)
+
+    client_id = np.arange(rows) // ACTIVE_MONTHS
+    month_id = (client_start[client_id] + np.arange(rows) % ACTIVE_MONTHS) % len(MONTHS)
+    order = rng.permutation(rows)
+    client_id, month_id = client_id[order], month_id[order]
+    amount = rng.choice(amounts, rows) * rng.lognormal(0, 0.1, rows)
+    return pd.DataFrame({
+        'salesperson_name': client_sp[client_id],
+        'client_name': clients[client_id],
+        'month_year': np.array(MONTHS, dtype=object)[month_id],
+        'total_amount': amount.round(5),
+    })
+
+
+def _dirty(values, rng, junk, share):
+    """Replace a `share` of values with junk strings."""
+    mask = rng.random(len(values)) < share
+    values[mask] = rng.choice(np.array(junk, dtype=object), mask.sum())
+    return values
+
+
+def _comma(numbers, decimals):
+    return pd.Series(numbers).map(f"{{:,.{decimals}f}}".format).to_numpy(dtype=object, copy=True)
+
+
+def purchase_frame(rows, seed=0):
+    """Raw purchase_report rows with every column as text, as exported."""
+    rng = np.random.default_rng(seed)
+    n_suppliers = max(50, rows // 2500)
+    n_items = max(200, rows // 200)
+    suppliers = _names(rng.permutation([f"{a} {b} {c} LIMITED" for a in SUPPLIER_WORDS for b in SUPPLIER_WORDS
+                                        for c in SUPPLIER_KINDS if a != b]).tolist(), n_suppliers, 100)
+    items = _names(rng.permutation([f"{kind} {unit} GRADE {g}" for kind in ITEM_KINDS for unit in ITEM_UNITS
+                                    for g in "ABCDEFGH"]).tolist(), n_items, 150)
+
+    # Suppliers and items are skewed: a few account for most orders
+    supplier_id = np.minimum(rng.zipf(1.3, rows) - 1, n_suppliers - 1)
+    item_id = np.minimum(rng.zipf(1.2, rows) - 1, n_items - 1)
+    item_rate = rng.lognormal(6, 1.2, n_items)
+
+    qty = rng.integers(1, 2000, rows).astype('float64')
+    rate = item_rate[item_id] * rng.lognormal(0, 0.05, rows)
+    pending = np.where(rng.random(rows) < 0.3, np.floor(qty * rng.random(rows)), 0.0)
+
+    days = pd.date_range('2019-01-01', '2024-12-31', freq='D')
+    day_id = rng.integers(0, len(days), rows)
+    style_id = rng.choice(len(PO_DATE_STYLES) + 1, rows,
+                          p=[share for _, share in PO_DATE_STYLES] + [1 - sum(s for _, s in PO_DATE_STYLES)])
+    po_date = np.empty(rows, dtype=object)
+    for i, (fmt, _) in enumerate(PO_DATE_STYLES):
+        mask = style_id == i
+        po_date[mask] = days.strftime(fmt).to_numpy(dtype=object)[day_id[mask]]
+    junk = style_id == len(PO_DATE_STYLES)
+    po_date[junk] = rng.choice(np.array(JUNK_DATES, dtype=object), junk.sum())
+
+    return pd.DataFrame({
+        'PO No': pd.Series(np.arange(rows) // 5).map("PO{:08d}".format).to_numpy(dtype=object),
+        'PO Date': po_date,
+        'Supplier Name': suppliers[supplier_id],
+        'Item Name': items[item_id],
+        'Qty': _dirty(_comma(qty, 2), rng, JUNK_NUMBERS, 0.01),
+        'Rate': _dirty(_comma(rate, 4), rng, JUNK_NUMBERS, 0.01),
+        'Amount': _dirty(_comma(qty * rate, 2), rng, JUNK_NUMBERS, 0.02),
+        'Pending Qty': _dirty(_comma(pending, 2), rng, JUNK_NUMBERS, 0.01),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=".")
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for name, frame in (("sales_by_person", sales_frame(args.rows, args.seed)),
+                        ("purchase_report", purchase_frame(args.rows, args.seed))):
+        path = os.path.join(args.out, f"{name}.csv")
+        frame.to_csv(path, index=False)
+        print(f"Wrote {len(frame):,} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
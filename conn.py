@@ -1,11 +1,519 @@
+import json
+import os
+import threading
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
+import numpy as np
 import pandas as pd
 
+from datastore import datasets, share
+from date_utils import PO_DATE_FORMATS, parse_dates
+from instrumentation import recorder
+from query_cache import QueryCache
+
+
+# Connection pool settings
+POOL_SIZE = 5              # maximum connections open at once per database
+POOL_TIMEOUT = 30          # seconds to wait for a free connection before giving up
+POOL_HEALTH_CHECK = 5      # ping connections that have been idle longer than this (seconds)
+POOL_RECYCLE = 3600        # replace connections older than this (seconds)
+
+# Concurrent query execution
+QUERY_WORKERS = POOL_SIZE  # threads running submitted queries; keep <= pool size
+
+# Query result cache settings
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # memory budget for cached results
+CACHE_TTL = 600                      # seconds before a cached result is refetched regardless
+CACHE_PROBE_INTERVAL = 10            # seconds between table-change probes
+CACHE_COUNT_FALLBACK = True          # use COUNT(*) when the engine does not report UPDATE_TIME
+
+# Incremental purchase loading
+PURCHASE_WATERMARK = None            # ("updated_at", timestamp_column, key_column) to skip auto-detection
+PURCHASE_UPDATED_AT_NAMES = ('updated_at', 'last_updated', 'modified_at', 'last_modified')
+PURCHASE_SNAPSHOT_DIR = None         # directory to persist the purchase snapshot across restarts
+
+# Paginated tables
+PAGE_SIZE = 50                       # rows per page when the caller does not say
+MAX_PAGE_SIZE = 1000                 # largest page fetch_page will return
+
+# pd.read_sql on a DBAPI connection re-raises driver errors as pandas DatabaseError
+# (the mysql.connector Error is its __cause__)
+QUERY_ERRORS = (Error, pd.errors.DatabaseError)
+
+
+class ConnectionPool:
+    """Thread-safe pool of MySQL connections shared across the whole process."""
+
+    def __init__(self, config, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 health_check=POOL_HEALTH_CHECK, recycle=POOL_RECYCLE):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self.health_check = health_check
+        self.recycle = recycle
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()  # (connection, created_at, released_at)
+        self._born = {}                 # id(connection) -> created_at
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._created = 0
+        self._reconnects = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _new_connection(self):
+        conn = mysql.connector.connect(autocommit=True, **self.config)
+        with self._lock:
+            self._created += 1
+            self._born[id(conn)] = time.monotonic()
+        print("Connection to MySQL database successful")
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._born.pop(id(conn), None)
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _is_healthy(self, conn, created_at, released_at):
+        now = time.monotonic()
+        if now - created_at > self.recycle:
+            return False
+        if now - released_at <= self.health_check:
+            return True
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except Error:
+            return False
+
+    def acquire(self):
+        """Check out a healthy connection, waiting up to `timeout` seconds for a free slot."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolError(f"No free connection after {self.timeout}s (pool size {self.size})")
+        waited = time.perf_counter() - start
+        try:
+            conn = None
+            while conn is None:
+                try:
+                    conn, created_at, released_at = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._new_connection()
+                    break
+                if not self._is_healthy(conn, created_at, released_at):
+                    self._discard(conn)
+                    with self._lock:
+                        self._reconnects += 1
+                    conn = None
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, closing it instead if it is broken."""
+        with self._lock:
+            self._in_use -= 1
+            created_at = self._born.get(id(conn))
+        if discard or created_at is None:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, created_at, time.monotonic()))
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always gives it back."""
+        conn = self.acquire()
+        try:
+            yield conn
+        except QUERY_ERRORS:
+            self.release(conn, discard=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def stats(self):
+        """Return a snapshot of pool usage for monitoring."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "created": self._created,
+                "checkouts": self._checkouts,
+                "reconnects": self._reconnects,
+                "timeouts": self._timeouts,
+                "wait_total_s": self._wait_total,
+                "wait_avg_s": self._wait_total / self._checkouts if self._checkouts else 0.0,
+                "wait_max_s": self._wait_max,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide thread pool used by MySQLDatabase.submit()."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="mysql-query")
+        return _executor
+
+
+query_cache = QueryCache(max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL)
+_table_versions = {}  # (database, table) -> (version, probed_at)
+_table_versions_lock = threading.Lock()
+_rollup_synced = {}  # database -> sales_by_person version the rollups were last synced at
+_rollup_lock = threading.Lock()  # one rollup refresh at a time per process
+_rollup_engines_checked = {}  # database -> True once every rollup table is known to be InnoDB
+
+ROLLUP_TABLES = ("sales_rollup_monthly", "sales_rollup_month", "sales_rollup_salesperson", "sales_rollup_client")
+
+# Tables fetch_page may read. Only these columns can be sorted (shown name ->
+# SQL column) or filtered on; `tiebreak` makes the row order stable across pages.
+PAGED_TABLES = {
+    "sales_by_person": {
+        "columns": ["salesperson_name", "client_name", "month_year", "total_amount"],
+        "sortable": {"month_year": "period", "salesperson_name": "salesperson_name",
+                     "client_name": "client_name", "total_amount": "total_amount"},
+        "filterable": ["salesperson_name", "client_name", "month_year"],
+        "default_sort": "month_year",
+        "tiebreak": ["salesperson_name", "client_name", "month_year"],
+    },
+    "purchase_report": {
+        "columns": ["*"],
+        "sortable": {"PO Date": "PO Date", "Supplier Name": "Supplier Name", "Item Name": "Item Name",
+                     "Amount": "Amount", "Qty": "Qty", "Rate": "Rate", "Pending Qty": "Pending Qty"},
+        "filterable": ["Supplier Name", "Item Name"],
+        "default_sort": "PO Date",
+        "tiebreak": ["PO Date", "Supplier Name", "Item Name"],
+    },
+}
+
+
+def period_from_month_year(month_year):
+    """Convert 'YY-Mon' labels (e.g. '23-Jan') to the first day of that month.
+
+    Loaders writing to sales_by_person use this to fill the indexed `period`
+    column; unparseable labels become NaT.
+    """
+    return parse_dates(pd.Series(month_year), formats=['%y-%b'], extract_iso=False)
+
+
+def _period_match(periods):
+    """WHERE condition and parameters matching any of `periods` (which may include None)."""
+    dated = [p for p in periods if p is not None]
+    clauses = ["period IN (" + ", ".join(["%s"] * len(dated)) + ")"] if dated else []
+    if len(dated) < len(periods):
+        clauses.append("period IS NULL")
+    return " OR ".join(clauses), dated
+
+
+def build_sales_profile(name, monthly):
+    """Summarise one entity's monthly sales (columns period, month_year, total_sales).
+
+    yoy_change compares the 12 months up to the latest month with the 12 months
+    before that, as a percentage; it is None without a full prior year of data.
+    """
+    monthly = monthly.reset_index(drop=True)
+    periods = pd.to_datetime(monthly['period'])
+    last = periods.max()
+    yoy_change = None
+    if pd.notna(last):
+        recent = monthly.loc[periods > last - pd.DateOffset(months=12), 'total_sales'].sum()
+        window = (periods > last - pd.DateOffset(months=24)) & (periods <= last - pd.DateOffset(months=12))
+        previous = monthly.loc[window, 'total_sales'].sum()
+        if window.any() and previous != 0:
+            yoy_change = float((recent - previous) / abs(previous) * 100)
+    return {
+        "name": name,
+        "sales": monthly[['month_year', 'total_sales']],
+        "total_sales": float(monthly['total_sales'].sum()),
+        "first_month": monthly['month_year'].iloc[0] if not monthly.empty else None,
+        "last_month": monthly['month_year'].iloc[-1] if not monthly.empty else None,
+        "average_monthly_sales": float(monthly['total_sales'].mean()) if not monthly.empty else 0.0,
+        "yoy_change": yoy_change,
+    }
+
+
+def _empty_profile(name):
+    return build_sales_profile(name, pd.DataFrame(columns=['period', 'month_year', 'total_sales']))
+
+
+CATEGORY_COLUMNS = ('salesperson_name', 'client_name', 'month_year', 'Supplier Name', 'Item Name')
+_categories = {}  # column -> pd.Index of every value seen in this process, in first-seen order
+_categories_lock = threading.Lock()
+
+
+def _known_categories(column, values):
+    """Return the registry categories for `column`, appending values not seen before."""
+    uniques = pd.Index(values.dropna().unique())
+    with _categories_lock:
+        known = _categories.get(column)
+        if known is None:
+            known = pd.Index([], dtype=object)
+        new = uniques[~uniques.isin(known)]
+        if len(new):
+            known = known.append(new)
+            _categories[column] = known
+        return known
+
+
+def encode_categories(data, columns=CATEGORY_COLUMNS):
+    """Store repeated name columns as categoricals, in place.
+
+    Categories come from a process-wide registry that only ever grows, so the
+    same name has the same code in every frame a loader returns. Frames
+    encoded at different times may carry different category lists, so run
+    concatenated results through this again. Group these columns with
+    observed=True to skip names absent from the frame.
+    """
+    for column in columns:
+        if column not in data.columns:
+            continue
+        values = data[column]
+        known = _known_categories(column, values)
+        if isinstance(values.dtype, pd.CategoricalDtype) and values.cat.categories.equals(known):
+            continue
+        data[column] = pd.Categorical(values, categories=known)
+    return data
+
+
+class IndexedFrame:
+    """A frame plus the row positions of every value in some of its columns.
+
+    Selecting the rows for a supplier or item is then a dictionary lookup and
+    an iloc instead of a boolean mask over the whole frame. The frame may be
+    shared between sessions: read from it, never modify it in place.
+    """
+
+    def __init__(self, frame, columns):
+        self.frame = frame
+        self.positions = {
+            column: frame.groupby(column, observed=True, sort=False).indices
+            for column in columns if column in frame.columns
+        }
+
+    def values(self, column):
+        """Distinct non-null values of an indexed column, in first-seen order."""
+        return list(self.positions.get(column, {}))
+
+    def rows(self, column, value):
+        """Row positions holding `value` in `column` (empty if there are none)."""
+        return self.positions[column].get(value, np.empty(0, dtype=np.intp))
+
+    def select(self, **filters):
+        """Rows matching every `column=value` filter; None means no filter.
+
+        Column names with spaces go through a dict: select(**{'Item Name': item}).
+        """
+        selected = None
+        for column, value in filters.items():
+            if value is None:
+                continue
+            rows = self.rows(column, value)
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+        if selected is None:
+            return share(self.frame)
+        return self.frame.iloc[selected]
+
+    def __sizeof__(self):
+        # Only the positions: the frame is usually shared with another dataset
+        return sum(rows.nbytes for positions in self.positions.values() for rows in positions.values())
+
+
+PURCHASE_INDEX_COLUMNS = ('Supplier Name', 'Item Name')
+PURCHASE_NUMERIC_COLUMNS = ['Amount', 'Rate', 'Qty', 'Pending Qty']
+
+
+def fix_po_date(data):
+    """Parse PO Date to datetime64.
+
+    A typed DATE column (migrations/004) is converted directly; a dirty VARCHAR
+    is parsed with the formats in date_utils.PO_DATE_FORMATS.
+    """
+    if 'PO Date' not in data.columns:
+        return data
+    values = data['PO Date']
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return data
+    first = values.dropna().iloc[0] if values.notna().any() else None
+    if isinstance(first, date):
+        data['PO Date'] = pd.to_datetime(values, errors='coerce')
+        return data
+    data['PO Date'] = parse_dates(values, PO_DATE_FORMATS).dt.normalize()
+    return data
+
+
+def clean_purchase_data(data):
+    """Convert comma-formatted purchase amounts and quantities to float64 in place.
+
+    Values that cannot be parsed become 0, matching what the pages used to do
+    with fillna after their own conversion.
+    """
+    for column in PURCHASE_NUMERIC_COLUMNS:
+        if column not in data.columns:
+            continue
+        values = data[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values.astype("string").str.replace(",", "", regex=False), errors='coerce')
+        data[column] = values.astype("float64").fillna(0)
+    return data
+
+
+def _to_python(value):
+    """Turn pandas/numpy scalars into plain Python values the MySQL driver can bind."""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+class PurchaseSnapshot:
+    """Process-wide copy of purchase_report plus the watermark it was loaded up to."""
+
+    def __init__(self, database):
+        self.database = database
+        self.lock = threading.Lock()
+        self.strategy = None
+        self.watermark_column = None
+        self.key_column = None
+        self.frame = None
+        self.watermark = None
+        self.version = None
+        self.last_sync = None
+        self.full_loads = 0
+        self.delta_loads = 0
+        self.delta_rows = 0
+
+    def replace(self, frame):
+        self.frame = frame
+        column = self.watermark_column
+        self.watermark = _to_python(frame[column].max()) if column in frame.columns and not frame.empty else None
+        self.full_loads += 1
+
+    def delete(self):
+        """Remove the persisted snapshot files, if any."""
+        if PURCHASE_SNAPSHOT_DIR is None:
+            return
+        for path in self._paths():
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _paths(self):
+        base = os.path.join(PURCHASE_SNAPSHOT_DIR, f"{self.database}.purchase_report")
+        return base + ".parquet", base + ".json"
+
+    def save(self):
+        """Persist the snapshot to PURCHASE_SNAPSHOT_DIR, if configured."""
+        if PURCHASE_SNAPSHOT_DIR is None or self.frame is None:
+            return
+        os.makedirs(PURCHASE_SNAPSHOT_DIR, exist_ok=True)
+        frame_path, meta_path = self._paths()
+        self.frame.to_parquet(frame_path + ".tmp", index=False)
+        os.replace(frame_path + ".tmp", frame_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"strategy": self.strategy, "watermark_column": self.watermark_column,
+                       "watermark": None if self.watermark is None else str(self.watermark)}, f)
+
+    def restore(self):
+        """Load a snapshot saved by a previous process if it used the same strategy."""
+        if PURCHASE_SNAPSHOT_DIR is None or self.strategy == "full":
+            return
+        frame_path, meta_path = self._paths()
+        if not (os.path.exists(frame_path) and os.path.exists(meta_path)):
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if (meta["strategy"], meta["watermark_column"]) != (self.strategy, self.watermark_column):
+            return
+        self.frame = pd.read_parquet(frame_path)
+        self.watermark = _to_python(self.frame[self.watermark_column].max()) if not self.frame.empty else None
+
+
+_purchase_snapshots = {}
+_purchase_snapshots_lock = threading.Lock()
+
+
+def _purchase_snapshot(database):
+    with _purchase_snapshots_lock:
+        if database not in _purchase_snapshots:
+            _purchase_snapshots[database] = PurchaseSnapshot(database)
+        return _purchase_snapshots[database]
+
+
+def sales_kpis(trend, top_salespersons, top_clients):
+    """Total sales, top salesperson and top client from a monthly trend and two rankings."""
+    return {
+        "total_sales": float(trend['total_amount'].sum()) if not trend.empty else 0.0,
+        "top_salesperson": top_salespersons['salesperson_name'].iloc[0] if not top_salespersons.empty else None,
+        "top_client": top_clients['client_name'].iloc[0] if not top_clients.empty else None,
+    }
+
+
+def supplier_comparison(data):
+    """Per-supplier totals: amount, quantity, average rate, pending quantity and fulfillment %."""
+    comparison = data.groupby('Supplier Name', observed=True).agg(
+        total_amount=('Amount', 'sum'),
+        total_qty=('Qty', 'sum'),
+        avg_rate=('Rate', 'mean'),
+        total_pending_qty=('Pending Qty', 'sum'),
+    ).reset_index()
+    comparison['fulfillment_rate'] = (
+        (comparison['total_qty'] - comparison['total_pending_qty']) /
+        comparison['total_qty'] * 100
+    ).fillna(0)
+    return comparison
+
+
+def get_pool(config, size=POOL_SIZE):
+    """Return the process-wide pool for `config`, creating it on first use."""
+    key = (config["host"], config.get("port"), config["user"], config["database"])
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(config, size=size)
+        return _pools[key]
+
 
 class MySQLDatabase:
-    def __init__(self):
-        """Initialize database connection settings."""
+    def __init__(self, pool_size=POOL_SIZE, host=None, user=None, password=None, database=None, port=None):
+        """Initialize database connection settings.
+
+        The keyword arguments override the built-in server, e.g. to point the
+        benchmarks at a scratch database.
+        """
         """
         
         self.host = "localhost"
@@ -18,146 +526,740 @@ class MySQLDatabase:
         """
         
         
-        self.host = "database-1.c9wq6somacoq.ap-south-1.rds.amazonaws.com"
-        self.user = "beeshaker"
-        self.password = "eNJD7QvFIT1"
-        self.database = "colorlabels"
+        self.host = host or "database-1.c9wq6somacoq.ap-south-1.rds.amazonaws.com"
+        self.user = user or "beeshaker"
+        self.password = "eNJD7QvFIT1" if password is None else password
+        self.database = database or "colorlabels"
         self.conn = None
         self.cursor = None
-        
-        
+        config = {"host": self.host, "user": self.user, "password": self.password, "database": self.database}
+        if port is not None:
+            config["port"] = port
+        self.pool = get_pool(config, size=pool_size)
 
     def connect(self):
-        """Establish a connection to the database."""
+        """Check out a pooled connection for direct use; give it back with close()."""
+        if self.conn:
+            return
         try:
-            self.conn = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
-            if self.conn.is_connected():
-                self.cursor = self.conn.cursor(buffered=True)
-                print("Connection to MySQL database successful")
+            self.conn = self.pool.acquire()
+            self.cursor = self.conn.cursor(buffered=True)
         except Error as e:
             print(f"Error: {e}")
             self.conn = None
 
     def close(self):
-        """Close the connection to the database."""
+        """Return the connection checked out by connect() to the pool."""
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.conn:
-            self.conn.close()
-            print("Connection closed")
+            self.pool.release(self.conn)
+            self.conn = None
+
+    def pool_stats(self):
+        """Return connection pool usage (in use, idle, wait time, reconnects)."""
+        return self.pool.stats()
+
+    def submit(self, fn, *args, **kwargs):
+        """Run a MySQLDatabase method (or any callable) on a worker thread; returns a Future.
+
+        Each call checks out its own pooled connection, so independent queries
+        submitted together run in parallel.
+        """
+        return get_executor().submit(fn, *args, **kwargs)
+
+    def run_concurrently(self, calls):
+        """Run independent calls in parallel and return their results by name.
+
+        `calls` maps a name to a callable or to a (callable, arg, ...) tuple, e.g.
+        {"purchases": db.load_clean_purchase_data,
+         "profile": (db.fetch_client_profile, "ACME LTD")}.
+        Latency is that of the slowest call; the first exception is re-raised.
+        """
+        futures = {}
+        for name, call in calls.items():
+            fn, *args = call if isinstance(call, tuple) else (call,)
+            futures[name] = self.submit(fn, *args)
+        return {name: future.result() for name, future in futures.items()}
+
+    def cache_stats(self):
+        """Return query cache counters (hits, misses, evictions, footprint)."""
+        return query_cache.stats()
+
+    def clear_cache(self):
+        """Drop every cached query result, table version, purchase snapshot and shared dataset."""
+        query_cache.clear()
+        with _table_versions_lock:
+            _table_versions.clear()
+        _rollup_engines_checked.pop(self.database, None)
+        # Snapshots may predate a schema change, so rebuild them from scratch
+        with _purchase_snapshots_lock:
+            _purchase_snapshots.pop(self.database, None)
+        PurchaseSnapshot(self.database).delete()
+        datasets.discard(lambda key: key[0] == self.database)
+
+    def table_versions(self, tables):
+        """Return a change token for each table, or None if they cannot be probed.
+
+        Tokens come from information_schema.TABLES (UPDATE_TIME, TABLE_ROWS,
+        DATA_LENGTH), falling back to COUNT(*) when the engine leaves UPDATE_TIME
+        empty. Probes are reused for CACHE_PROBE_INTERVAL seconds.
+        """
+        now = time.monotonic()
+        with _table_versions_lock:
+            known = {t: _table_versions.get((self.database, t)) for t in tables}
+        stale = [t for t, v in known.items() if v is None or now - v[1] > CACHE_PROBE_INTERVAL]
+        if stale:
+            placeholders = ", ".join(["%s"] * len(stale))
+            query = f"""
+                SELECT TABLE_NAME, UPDATE_TIME, TABLE_ROWS, DATA_LENGTH
+                FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({placeholders});
+            """
+            start = acquired = time.perf_counter()
+            try:
+                with self.pool.connection() as conn:
+                    acquired = time.perf_counter()
+                    cursor = conn.cursor()
+                    try:
+                        # MySQL 8 caches table statistics for a day unless told otherwise
+                        cursor.execute("SET SESSION information_schema_stats_expiry = 0;")
+                    except Error:
+                        pass
+                    cursor.execute(query, [self.database] + stale)
+                    rows = {name: (update_time, table_rows, data_length)
+                            for name, update_time, table_rows, data_length in cursor.fetchall()}
+                    for table in stale:
+                        version = rows.get(table)
+                        if version is not None and version[0] is None and CACHE_COUNT_FALLBACK:
+                            cursor.execute(f"SELECT COUNT(*) FROM `{table}`;")
+                            version = version + cursor.fetchone()
+                        known[table] = (version, now)
+                    cursor.close()
+            except Error as e:
+                print(f"Error: {e}")
+                recorder.record_query("table_versions", time.perf_counter() - acquired,
+                                      acquire_seconds=acquired - start, sql=query, error=str(e))
+                return None
+            recorder.record_query("table_versions", time.perf_counter() - acquired, rows=len(rows),
+                                  acquire_seconds=acquired - start, sql=query)
+            with _table_versions_lock:
+                for table in stale:
+                    _table_versions[(self.database, table)] = known[table]
+        return tuple(known[t][0] for t in tables)
+
+    def _execute_sql(self, query, params=None, *, name):
+        """Run a query on a pooled connection; returns None if no connection is available.
+
+        Every call is recorded in instrumentation.recorder under `name`, the
+        public method (or loading step) that issued it.
+        """
+        start = acquired = time.perf_counter()
+        try:
+            with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                data = pd.read_sql(query, conn, params=params)
+        except QUERY_ERRORS as e:
+            error = e.__cause__ or e
+            print(f"Error: {error}")
+            recorder.record_query(name, time.perf_counter() - acquired, acquire_seconds=acquired - start,
+                                  sql=query, error=str(error))
+            return None
+        recorder.record_query(name, time.perf_counter() - acquired, rows=len(data),
+                              nbytes=int(data.memory_usage(index=True, deep=True).sum()),
+                              acquire_seconds=acquired - start, sql=query)
+        return data
+
+    def _read_sql(self, query, params=None, tables=None, *, name):
+        """Run a query, serving it from the result cache when `tables` have not changed.
+
+        `name` labels the query in instrumentation.recorder. Returns an empty
+        DataFrame if no connection is available.
+        """
+        version = self.table_versions(tables) if tables else None
+        key = (self.database, query, tuple(params) if params else None)
+        if version is not None:
+            cached = query_cache.get(key, version)
+            if cached is not None:
+                return share(cached)
+
+        data = self._execute_sql(query, params, name=name)
+        if data is None:
+            return pd.DataFrame()
+        if version is not None:
+            query_cache.put(key, share(data), version)
+        return data
+
+    def fetch_page(self, table, page=1, page_size=PAGE_SIZE, sort=None, descending=False, filters=None):
+        """Fetch one page of a PAGED_TABLES table and the number of matching rows.
+
+        `filters` maps filterable columns to the value they must equal (None
+        means no filter). Sorting, filtering and LIMIT/OFFSET run in MySQL, so
+        only the requested rows are transferred; the page and the COUNT(*) are
+        cached until the table changes. Returns (frame, total_rows); a page past
+        the end comes back empty.
+        """
+        if table not in PAGED_TABLES:
+            raise ValueError(f"{table} cannot be paged")
+        spec = PAGED_TABLES[table]
+        sort = sort or spec["default_sort"]
+        if sort not in spec["sortable"]:
+            raise ValueError(f"{table} cannot be sorted by {sort}")
+        filters = {column: value for column, value in (filters or {}).items() if value is not None}
+        unknown = set(filters) - set(spec["filterable"])
+        if unknown:
+            raise ValueError(f"{table} cannot be filtered by {', '.join(sorted(unknown))}")
+        page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+        page = max(int(page), 1)
+
+        where = " AND ".join(f"`{column}` = %s" for column in filters)
+        where = f"WHERE {where}" if where else ""
+        params = list(filters.values())
+        count = self._read_sql(f"SELECT COUNT(*) AS n FROM {table} {where};", params, tables=(table,),
+                               name="fetch_page count")
+        total = int(count['n'][0]) if not count.empty else 0
+        if total <= (page - 1) * page_size:
+            return pd.DataFrame(), total
+
+        direction = "DESC" if descending else "ASC"
+        order = [f"`{spec['sortable'][sort]}` {direction}"]
+        order += [f"`{column}`" for column in spec["tiebreak"] if column != spec["sortable"][sort]]
+        columns = ", ".join(c if c == "*" else f"`{c}`" for c in spec["columns"])
+        query = f"""
+            SELECT {columns} FROM {table}
+            {where}
+            ORDER BY {", ".join(order)}
+            LIMIT %s OFFSET %s;
+        """
+        data = self._read_sql(query, params + [page_size, (page - 1) * page_size], tables=(table,),
+                              name="fetch_page")
+        return data, total
 
     def load_sales_data(self):
-        """Load all sales data from the database."""
-        self.connect()
-        if not self.conn:
-            return pd.DataFrame()  # Return an empty DataFrame if connection fails
+        """Load all sales data from the database (name columns as categoricals).
+
+        Served from the shared dataset store; see _dataset.
+        """
         query = "SELECT salesperson_name, client_name, month_year, total_amount FROM sales_by_person;"
-        return pd.read_sql(query, self.conn)
+
+        def build():
+            data = self._execute_sql(query, name="load_sales_data")
+            return pd.DataFrame() if data is None else encode_categories(data)
+
+        return self._dataset("sales", ("sales_by_person",), build).view()
 
     def fetch_all_clients(self):
         """Fetch all distinct clients from the database."""
-        self.connect()
-        if not self.conn:
-            return pd.DataFrame()  # Return an empty DataFrame if connection fails
         query = "SELECT DISTINCT client_name FROM sales_by_person ORDER BY client_name;"
-        return pd.read_sql(query, self.conn)
+        return self._read_sql(query, tables=("sales_by_person",), name="fetch_all_clients")
 
     def fetch_all_salespersons(self):
         """Fetch all distinct salespersons from the database."""
-        self.connect()
-        if not self.conn:
-            return pd.DataFrame()  # Return an empty DataFrame if connection fails
         query = "SELECT DISTINCT salesperson_name FROM sales_by_person ORDER BY salesperson_name;"
-        return pd.read_sql(query, self.conn)
+        return self._read_sql(query, tables=("sales_by_person",), name="fetch_all_salespersons")
 
     def fetch_client_sales(self, client_name):
         """Fetch sales data for a specific client, grouped by month."""
-        self.connect()
-        if not self.conn:
-            return pd.DataFrame()  # Return an empty DataFrame if connection fails
-        query = f"""
-            SELECT month_year, SUM(total_amount) AS total_sales
+        query = """
+            SELECT DATE_FORMAT(period, '%y-%b') AS month_year, SUM(total_amount) AS total_sales
             FROM sales_by_person
-            WHERE client_name = '{client_name}'
-            GROUP BY month_year
-            ORDER BY STR_TO_DATE(month_year, '%y-%b');
+            WHERE client_name = %s
+            GROUP BY period
+            ORDER BY period;
         """
-        return pd.read_sql(query, self.conn)
+        return self._read_sql(query, params=(client_name,), tables=("sales_by_person",), name="fetch_client_sales")
 
     def fetch_salesperson_sales(self, salesperson_name):
         """Fetch sales data for a specific salesperson, grouped by month."""
-        self.connect()
-        if not self.conn:
-            return pd.DataFrame()  # Return an empty DataFrame if connection fails
-        query = f"""
-            SELECT month_year, SUM(total_amount) AS total_sales
+        query = """
+            SELECT DATE_FORMAT(period, '%y-%b') AS month_year, SUM(total_amount) AS total_sales
             FROM sales_by_person
-            WHERE salesperson_name = '{salesperson_name}'
-            GROUP BY month_year
-            ORDER BY STR_TO_DATE(month_year, '%y-%b');
+            WHERE salesperson_name = %s
+            GROUP BY period
+            ORDER BY period;
         """
-        return pd.read_sql(query, self.conn)
+        return self._read_sql(query, params=(salesperson_name,), tables=("sales_by_person",),
+                              name="fetch_salesperson_sales")
 
     def fetch_client_total_sales(self, client_name):
         """Fetch the total sales for a specific client."""
-        self.connect()
-        if not self.conn:
-            return 0  # Return 0 if connection fails
-        query = f"""
+        query = """
             SELECT SUM(total_amount) AS total_sales
             FROM sales_by_person
-            WHERE client_name = '{client_name}';
+            WHERE client_name = %s;
         """
-        result = pd.read_sql(query, self.conn)
+        result = self._read_sql(query, params=(client_name,), tables=("sales_by_person",),
+                               name="fetch_client_total_sales")
         return result['total_sales'][0] if not result.empty else 0
 
     def fetch_salesperson_total_sales(self, salesperson_name):
         """Fetch the total sales for a specific salesperson."""
-        self.connect()
-        if not self.conn:
-            return 0  # Return 0 if connection fails
-        query = f"""
+        query = """
             SELECT SUM(total_amount) AS total_sales
             FROM sales_by_person
-            WHERE salesperson_name = '{salesperson_name}';
+            WHERE salesperson_name = %s;
         """
-        result = pd.read_sql(query, self.conn)
+        result = self._read_sql(query, params=(salesperson_name,), tables=("sales_by_person",),
+                               name="fetch_salesperson_total_sales")
         return result['total_sales'][0] if not result.empty else 0
 
     def fetch_sales_in_year(self, year):
         """Fetch all sales for a specific year."""
-        self.connect()
-        if not self.conn:
-            return pd.DataFrame()  # Return an empty DataFrame if connection fails
-        query = f"""
+        query = """
             SELECT salesperson_name, client_name, month_year, total_amount
             FROM sales_by_person
-            WHERE YEAR(STR_TO_DATE(month_year, '%y-%b')) = {year};
+            WHERE period >= %s AND period < %s
+            ORDER BY period;
+        """
+        params = (date(int(year), 1, 1), date(int(year) + 1, 1, 1))
+        return self._read_sql(query, params=params, tables=("sales_by_person",), name="fetch_sales_in_year")
+
+    def fetch_client_profile(self, client_name):
+        """Fetch a client's monthly sales, total and summary stats in one query."""
+        return self._fetch_profiles('client_name', [client_name], "fetch_client_profile").get(
+            client_name, _empty_profile(client_name))
+
+    def fetch_salesperson_profile(self, salesperson_name):
+        """Fetch a salesperson's monthly sales, total and summary stats in one query."""
+        return self._fetch_profiles('salesperson_name', [salesperson_name], "fetch_salesperson_profile").get(
+            salesperson_name, _empty_profile(salesperson_name))
+
+    def fetch_client_profiles(self, client_names=None):
+        """Fetch profiles for many clients (all of them by default) in one query."""
+        return self._fetch_profiles('client_name', client_names, "fetch_client_profiles")
+
+    def fetch_salesperson_profiles(self, salesperson_names=None):
+        """Fetch profiles for many salespersons (all of them by default) in one query."""
+        return self._fetch_profiles('salesperson_name', salesperson_names, "fetch_salesperson_profiles")
+
+    def _fetch_profiles(self, column, names, query_name):
+        """Return {name: profile} built from one grouped query over sales_by_person."""
+        params = []
+        where = ""
+        if names is not None:
+            names = list(names)
+            if not names:
+                return {}
+            where = f"WHERE {column} IN ({', '.join(['%s'] * len(names))})"
+            params = names
+        query = f"""
+            SELECT {column} AS name, period, DATE_FORMAT(period, '%y-%b') AS month_year,
+                   SUM(total_amount) AS total_sales
+            FROM sales_by_person
+            {where}
+            GROUP BY {column}, period
+            ORDER BY {column}, period;
         """
-        return pd.read_sql(query, self.conn)
+        data = self._read_sql(query, params=params, tables=("sales_by_person",), name=query_name)
+        if data.empty:
+            return {}
+        return {name: build_sales_profile(name, group) for name, group in data.groupby('name', sort=False)}
+
+    def fetch_sales_filter_options(self):
+        """Fetch the distinct salespersons, clients and months for filter widgets.
+
+        Served from the small rollup tables rather than a DISTINCT scan of
+        sales_by_person; months come back in calendar order.
+        """
+        self._sync_sales_rollup()
+        salespersons = self._read_sql(
+            "SELECT salesperson_name FROM sales_rollup_salesperson ORDER BY salesperson_name;",
+            tables=("sales_rollup_salesperson",),
+            name="fetch_sales_filter_options",
+        )
+        clients = self._read_sql(
+            "SELECT client_name FROM sales_rollup_client ORDER BY client_name;",
+            tables=("sales_rollup_client",),
+            name="fetch_sales_filter_options",
+        )
+        months = self._read_sql(
+            "SELECT month_year FROM sales_rollup_month ORDER BY period;",
+            tables=("sales_rollup_month",),
+            name="fetch_sales_filter_options",
+        )
+        return {
+            "salespersons": salespersons['salesperson_name'].dropna().tolist() if not salespersons.empty else [],
+            "clients": clients['client_name'].dropna().tolist() if not clients.empty else [],
+            "months": months['month_year'].dropna().tolist() if not months.empty else [],
+        }
+
+    # sales rollups
+    def refresh_sales_rollup(self, full=False):
+        """Recompute the rollup tables for months changed since the last refresh.
+
+        Months are queued in sales_rollup_dirty by triggers on sales_by_person;
+        pass full=True to rebuild every month. The queued months are locked,
+        rebuilt and dequeued in one transaction, so a failed refresh leaves them
+        queued and a write landing meanwhile re-queues its month once this
+        commits. Returns the number of months refreshed, or None if the
+        database is unreachable or the rollup tables are not transactional.
+        """
+        if not self._rollup_tables_transactional():
+            return None
+        start = acquired = time.perf_counter()
+        try:
+            with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                cursor = conn.cursor()
+                conn.start_transaction()
+                try:
+                    cursor.execute("SELECT period FROM sales_rollup_dirty FOR UPDATE;")
+                    queued = [p for (p,) in cursor.fetchall()]
+                    if full:
+                        cursor.execute("SELECT DISTINCT period FROM sales_by_person;")
+                        periods = [p for (p,) in cursor.fetchall()]
+                        # Every row, so months no longer in sales_by_person are dropped too
+                        match, params = "TRUE", []
+                    elif queued:
+                        periods = queued
+                        match, params = _period_match(periods)
+                    else:
+                        conn.rollback()
+                        return 0
+
+                    cursor.execute(f"DELETE FROM sales_rollup_monthly WHERE {match};", params)
+                    cursor.execute(f"""
+                        INSERT INTO sales_rollup_monthly
+                        SELECT salesperson_name, client_name, period, MIN(month_year),
+                               COALESCE(SUM(total_amount), 0), COUNT(*)
+                        FROM sales_by_person
+                        WHERE {match}
+                        GROUP BY period, salesperson_name, client_name;
+                    """, params)
+                    cursor.execute(f"DELETE FROM sales_rollup_month WHERE {match};", params)
+                    cursor.execute(f"""
+                        INSERT INTO sales_rollup_month
+                        SELECT period, MIN(month_year), COALESCE(SUM(total_amount), 0), SUM(row_count)
+                        FROM sales_rollup_monthly
+                        WHERE {match}
+                        GROUP BY period;
+                    """, params)
+                    cursor.execute("DELETE FROM sales_rollup_salesperson;")
+                    cursor.execute("""
+                        INSERT INTO sales_rollup_salesperson
+                        SELECT salesperson_name, COALESCE(SUM(total_amount), 0) FROM sales_rollup_monthly
+                        GROUP BY salesperson_name;
+                    """)
+                    cursor.execute("DELETE FROM sales_rollup_client;")
+                    cursor.execute("""
+                        INSERT INTO sales_rollup_client
+                        SELECT client_name, COALESCE(SUM(total_amount), 0) FROM sales_rollup_monthly
+                        GROUP BY client_name;
+                    """)
+                    # Dequeue only the months locked above; all of them have just been rebuilt
+                    if queued:
+                        dequeue, dequeue_params = _period_match(queued)
+                        cursor.execute(f"DELETE FROM sales_rollup_dirty WHERE {dequeue};", dequeue_params)
+                    conn.commit()
+                except BaseException:
+                    try:
+                        conn.rollback()
+                    except Error:
+                        pass
+                    raise
+                finally:
+                    cursor.close()
+        except Error as e:
+            print(f"Error: {e}")
+            recorder.record_query("refresh_sales_rollup", time.perf_counter() - acquired,
+                                  acquire_seconds=acquired - start, error=str(e))
+            return None
+        recorder.record_query("refresh_sales_rollup", time.perf_counter() - acquired, rows=len(periods),
+                              acquire_seconds=acquired - start)
+        self._forget_table_versions(ROLLUP_TABLES)
+        return len(periods)
+
+    def _rollup_tables_transactional(self):
+        """True if every rollup table uses InnoDB; refreshing them is not atomic otherwise.
+
+        Only a positive answer is remembered, so a refresh after migration 002
+        has been applied (from any process) succeeds without a restart.
+        """
+        if _rollup_engines_checked.get(self.database):
+            return True
+        tables = ROLLUP_TABLES + ("sales_rollup_dirty",)
+        query = f"""
+            SELECT TABLE_NAME, ENGINE
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({", ".join(["%s"] * len(tables))});
+        """
+        engines = self._execute_sql(query, [self.database, *tables], name="refresh_sales_rollup engines")
+        if engines is None:
+            return False
+        engines.columns = [c.upper() for c in engines.columns]
+        other = engines[engines['ENGINE'].fillna('').str.upper() != 'INNODB']
+        transactional = other.empty and len(engines) == len(tables)
+        if not transactional:
+            print("Error: sales rollup tables must all exist and use InnoDB; found "
+                  + ", ".join(f"{t}={e}" for t, e in zip(engines['TABLE_NAME'], engines['ENGINE'])))
+        if transactional:
+            _rollup_engines_checked[self.database] = True
+        return transactional
+
+    def _forget_table_versions(self, tables):
+        with _table_versions_lock:
+            for table in tables:
+                _table_versions.pop((self.database, table), None)
+
+    def _sync_sales_rollup(self):
+        """Refresh the rollups if sales_by_person changed since they were last synced."""
+        version = self.table_versions(("sales_by_person",))
+        if version is None:
+            return
+        with _rollup_lock:
+            if _rollup_synced.get(self.database) != version and self.refresh_sales_rollup() is not None:
+                _rollup_synced[self.database] = version
+
+    def _sales_filters(self, salesperson=None, client=None, month=None):
+        """Build a WHERE clause and parameters for sales_by_person or the monthly rollup."""
+        clauses, params = [], []
+        if salesperson is not None:
+            clauses.append("salesperson_name = %s")
+            params.append(salesperson)
+        if client is not None:
+            clauses.append("client_name = %s")
+            params.append(client)
+        if month is not None:
+            period = period_from_month_year([month])[0]
+            clauses.append("period <=> %s")
+            params.append(None if pd.isna(period) else period.date())
+        where = "WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+
+    def fetch_monthly_sales_trend(self, salesperson=None, client=None, month=None):
+        """Fetch total sales per month from the rollups, optionally filtered."""
+        self._sync_sales_rollup()
+        where, params = self._sales_filters(salesperson, client, month)
+        if where:
+            query = f"""
+                SELECT period, MIN(month_year) AS month_year, SUM(total_amount) AS total_amount
+                FROM sales_rollup_monthly
+                {where}
+                GROUP BY period
+                ORDER BY period;
+            """
+            tables = ("sales_rollup_monthly",)
+        else:
+            query = """
+                SELECT period, month_year, total_amount
+                FROM sales_rollup_month
+                ORDER BY period;
+            """
+            tables = ("sales_rollup_month",)
+        return self._read_sql(query, params=params, tables=tables, name="fetch_monthly_sales_trend")
+
+    def fetch_top_salespersons(self, salesperson=None, client=None, month=None, limit=None):
+        """Fetch salespersons ranked by total sales from the rollups, optionally filtered."""
+        return self._fetch_rollup_ranking("salesperson_name", "sales_rollup_salesperson",
+                                          salesperson, client, month, limit, "fetch_top_salespersons")
+
+    def fetch_top_clients(self, salesperson=None, client=None, month=None, limit=None):
+        """Fetch clients ranked by total sales from the rollups, optionally filtered."""
+        return self._fetch_rollup_ranking("client_name", "sales_rollup_client",
+                                          salesperson, client, month, limit, "fetch_top_clients")
+
+    def _fetch_rollup_ranking(self, column, totals_table, salesperson, client, month, limit, query_name):
+        self._sync_sales_rollup()
+        where, params = self._sales_filters(salesperson, client, month)
+        limit_sql = f"LIMIT {int(limit)}" if limit else ""
+        if where:
+            query = f"""
+                SELECT {column}, SUM(total_amount) AS total_amount
+                FROM sales_rollup_monthly
+                {where}
+                GROUP BY {column}
+                ORDER BY total_amount DESC
+                {limit_sql};
+            """
+            tables = ("sales_rollup_monthly",)
+        else:
+            query = f"""
+                SELECT {column}, total_amount
+                FROM {totals_table}
+                ORDER BY total_amount DESC
+                {limit_sql};
+            """
+            tables = (totals_table,)
+        return self._read_sql(query, params=params, tables=tables, name=query_name)
+
+    def fetch_sales_kpis(self, salesperson=None, client=None, month=None):
+        """Fetch total sales, top salesperson and top client from the rollups (see sales_kpis)."""
+        return sales_kpis(
+            self.fetch_monthly_sales_trend(salesperson, client, month),
+            self.fetch_top_salespersons(salesperson, client, month, limit=1),
+            self.fetch_top_clients(salesperson, client, month, limit=1),
+        )
     
     #purchases
-    def load_purchase_data(self):
-        self.connect()
-        if not self.conn:
-            return pd.DataFrame() 
-            
+    def load_purchase_data(self, incremental=False):
+        """Load purchase_report with a parsed PO Date.
+
+        With incremental=True only rows added or changed since the previous call
+        are transferred and merged into a process-wide snapshot (see
+        purchase_snapshot_info for the watermark in use).
+        """
+        if incremental:
+            return encode_categories(self._sync_purchase_snapshot().copy())
         query = "SELECT * FROM purchase_report;"
-        data = pd.read_sql(query, self.conn)
-
-        # Fix PO Date if it's a corrupted or dirty VARCHAR column
-        if 'PO Date' in data.columns:
-            data['PO Date'] = (
-                data['PO Date']
-                .astype(str)
-                .str.strip()
-                .str.extract(r'(\d{4}-\d{2}-\d{2})')[0]  # extract valid YYYY-MM-DD only
-            )
-            data['PO Date'] = pd.to_datetime(data['PO Date'], errors='coerce')
+        data = self._read_sql(query, tables=("purchase_report",), name="load_purchase_data")
+        return encode_categories(fix_po_date(data))
 
-        return data
+    def load_clean_purchase_data(self):
+        """Load purchase_report with typed columns, cleaned once per data version.
+
+        Amount, Rate, Qty and Pending Qty are float64 with missing values as 0, and
+        PO Date is datetime64 (NaT where unparseable); Supplier Name and Item
+        Name are categoricals (see encode_categories). Rows are fetched
+        incrementally and the cleaned frame is shared by every session until
+        purchase_report changes; callers get a datastore.share() copy.
+        """
+        return self._purchase_dataset().view()
+
+    def load_purchase_index(self):
+        """Clean purchase data indexed by Supplier Name and Item Name.
+
+        Built once per purchase_report version over the shared clean frame, so
+        use select() or load_clean_purchase_data() rather than modifying `.frame`.
+        """
+        purchases = self._purchase_dataset()
+        # Keyed by the purchases build itself, so the index never outlives the frame it points into
+        return self._dataset(
+            "purchase_index", ("purchase_report",),
+            lambda: IndexedFrame(purchases.value, PURCHASE_INDEX_COLUMNS),
+            version=(purchases.version, purchases.loaded_at),
+        ).value
+
+    def load_supplier_comparison(self):
+        """supplier_comparison() over all purchases, computed once per data version."""
+        purchases = self._purchase_dataset()
+        return self._dataset(
+            "supplier_comparison", ("purchase_report",),
+            lambda: supplier_comparison(purchases.value),
+            version=(purchases.version, purchases.loaded_at),
+        ).view()
+
+    def _purchase_dataset(self):
+        return self._dataset(
+            "purchases", ("purchase_report",),
+            lambda: encode_categories(clean_purchase_data(self._sync_purchase_snapshot().copy())),
+        )
+
+    # shared datasets
+    def _dataset(self, name, tables, build, version=None):
+        """Return the shared datastore.Dataset `name` for the current version of `tables`.
+
+        build() runs once per version across all sessions of the process. If
+        the version cannot be probed the entry is rebuilt once it is CACHE_TTL
+        old. An empty result (also what a failed load returns) is not kept, so
+        the next call tries again.
+        """
+        version = version if version is not None else self.table_versions(tables)
+        entry = datasets.get((self.database, name), version, build, max_age=CACHE_TTL)
+        if entry.rows == 0:
+            datasets.discard(lambda key: key == (self.database, name))
+        return entry
+
+    def dataset_stats(self):
+        """Version, age, build time and size of every shared dataset in this process."""
+        return datasets.stats()
+
+    def purchase_snapshot_info(self):
+        """Describe the incremental purchase snapshot: strategy, watermark, rows, last sync."""
+        snapshot = _purchase_snapshot(self.database)
+        with snapshot.lock:
+            return {
+                "strategy": snapshot.strategy,
+                "watermark_column": snapshot.watermark_column,
+                "watermark": snapshot.watermark,
+                "rows": len(snapshot.frame) if snapshot.frame is not None else 0,
+                "full_loads": snapshot.full_loads,
+                "delta_loads": snapshot.delta_loads,
+                "delta_rows": snapshot.delta_rows,
+                "last_sync": snapshot.last_sync,
+            }
+
+    def _purchase_watermark_strategy(self):
+        """Pick how purchase_report can be loaded incrementally.
+
+        Returns (strategy, watermark_column, key_column): "updated_at" when the
+        table has a single-column primary key and an auto-updated timestamp,
+        else "full". A key alone is not enough: rows updated in place keep
+        their key, so a key watermark would never pick up the change.
+        """
+        if PURCHASE_WATERMARK is not None:
+            return PURCHASE_WATERMARK
+        query = """
+            SELECT COLUMN_NAME, COLUMN_KEY, EXTRA, DATA_TYPE
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'purchase_report';
+        """
+        columns = self._execute_sql(query, (self.database,), name="purchase_snapshot strategy")
+        if columns is None or columns.empty:
+            return ("full", None, None)
+        columns.columns = [c.upper() for c in columns.columns]
+        primary = columns[columns['COLUMN_KEY'] == 'PRI']
+        key = primary['COLUMN_NAME'].iloc[0] if len(primary) == 1 else None
+        extra = columns['EXTRA'].fillna('').str.lower()
+        updated = columns[
+            columns['DATA_TYPE'].isin(['timestamp', 'datetime'])
+            & (extra.str.contains('on update') | columns['COLUMN_NAME'].str.lower().isin(PURCHASE_UPDATED_AT_NAMES))
+        ]
+        if key is not None and not updated.empty:
+            return ("updated_at", updated['COLUMN_NAME'].iloc[0], key)
+        return ("full", None, None)
+
+    def _sync_purchase_snapshot(self):
+        """Bring the purchase snapshot up to date and return its frame (do not mutate it)."""
+        snapshot = _purchase_snapshot(self.database)
+        with snapshot.lock:
+            if snapshot.strategy is None:
+                snapshot.strategy, snapshot.watermark_column, snapshot.key_column = \
+                    self._purchase_watermark_strategy()
+                snapshot.restore()
+
+            version = self.table_versions(("purchase_report",))
+            if snapshot.frame is not None and version is not None and version == snapshot.version:
+                return snapshot.frame
+
+            if snapshot.frame is None or snapshot.strategy == "full" or not self._merge_purchase_delta(snapshot):
+                data = self._execute_sql("SELECT * FROM purchase_report;", name="purchase_snapshot full")
+                if data is None:
+                    return snapshot.frame if snapshot.frame is not None else pd.DataFrame()
+                snapshot.replace(fix_po_date(data))
+
+            snapshot.version = version
+            snapshot.last_sync = time.time()
+            snapshot.save()
+            return snapshot.frame
+
+    def _merge_purchase_delta(self, snapshot):
+        """Fetch rows past the watermark and merge them; False means a full reload is needed."""
+        column = snapshot.watermark_column
+        probe = self._execute_sql(f"SELECT COUNT(*) AS n, MAX(`{column}`) AS wm FROM purchase_report;",
+                                  name="purchase_snapshot probe")
+        if probe is None:
+            return False
+        total, latest = int(probe['n'][0]), _to_python(probe['wm'][0])
+        if latest == snapshot.watermark and total == len(snapshot.frame):
+            return True
+
+        # Inclusive so rows updated within the same second are not missed
+        delta = self._execute_sql(
+            f"SELECT * FROM purchase_report WHERE `{column}` >= %s;", (snapshot.watermark,),
+            name="purchase_snapshot delta",
+        )
+        if delta is None:
+            return False
+        delta = fix_po_date(delta)
+        key = snapshot.key_column
+        kept = snapshot.frame[~snapshot.frame[key].isin(delta[key])]
+        merged = pd.concat([kept, delta], ignore_index=True)
+        if len(merged) != total:
+            # Rows were deleted (or written mid-sync); start again from scratch
+            return False
+        snapshot.frame = merged
+        snapshot.watermark = _to_python(merged[column].max()) if not merged.empty else None
+        snapshot.delta_loads += 1
+        snapshot.delta_rows += len(delta)
+        return True
@@ -0,0 +1,143 @@
+"""One shared, versioned copy of each dashboard dataset per server process.
+
+Every Streamlit session runs in the same process, so instead of each session
+loading and cleaning its own copy of purchase_report or sales_by_person, the
+first session to need a dataset at a given data version builds it and all
+others reuse that object. Entries are never modified after they are built: a
+refresh builds a new object and swaps it in with one dictionary assignment,
+so readers always see either the old or the new version, never a mix.
+
+Callers get copies made by share(). With pandas copy-on-write on (the default
+from pandas 3) these are shallow: any change to such a copy, or to frames
+derived from it, copies the affected data first, so the shared frame cannot be
+altered. With it off they are deep copies. Importing this module does not
+change the option; main.py and every page call enable_copy_on_write(), since
+any of them can be the first script a server process runs.
+"""
+import sys
+import threading
+import time
+
+import pandas as pd
+
+
+def enable_copy_on_write():
+    """Turn on pandas copy-on-write for the whole process, so share() can hand out shallow copies."""
+    pd.set_option("mode.copy_on_write", True)
+
+
+def copy_on_write_enabled():
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except (KeyError, pd.errors.OptionError):
+        return True  # pandas 3 removed the option: copy-on-write is always on
+
+
+def share(frame):
+    """A copy of a shared frame that callers may modify without affecting it."""
+    return frame.copy(deep=not copy_on_write_enabled())
+
+
+class Dataset:
+    """An immutable dataset build: value, data version and load metadata."""
+
+    __slots__ = ("name", "value", "version", "loaded_at", "load_seconds", "nbytes", "rows")
+
+    def __init__(self, name, value, version, load_seconds):
+        self.name = name
+        self.value = value
+        self.version = version
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.nbytes = dataset_size(value)
+        self.rows = len(value.frame if hasattr(value, "frame") else value)
+
+    def view(self):
+        """A share() copy of a frame value; other values are returned as they are."""
+        if isinstance(self.value, pd.DataFrame):
+            return share(self.value)
+        return self.value
+
+
+def dataset_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value)
+
+
+class DatasetStore:
+    """Thread-safe map of dataset name -> current Dataset."""
+
+    def __init__(self):
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._builds = {}
+
+    def _lock_for(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name, version, build, max_age=None):
+        """Return the Dataset for `name` at `version`, building it with build() if needed.
+
+        Concurrent callers wait for a single build. When `version` is None (the
+        data version could not be probed) the current entry is served until it
+        is `max_age` seconds old and then rebuilt; with no `max_age` it is
+        always rebuilt.
+        """
+        entry = self._entries.get(name)
+        if self._fresh(entry, version, max_age):
+            return entry
+        with self._lock_for(name):
+            entry = self._entries.get(name)
+            if self._fresh(entry, version, max_age):
+                return entry
+            start = time.perf_counter()
+            value = build()
+            return self.put(name, value, version, time.perf_counter() - start)
+
+    @staticmethod
+    def _fresh(entry, version, max_age):
+        if entry is None:
+            return False
+        if version is not None:
+            return entry.version == version
+        return max_age is not None and time.time() - entry.loaded_at < max_age
+
+    def put(self, name, value, version, load_seconds=0.0):
+        """Swap in a new build of `name`."""
+        entry = Dataset(name, value, version, load_seconds)
+        with self._lock:
+            self._entries[name] = entry
+            self._builds[name] = self._builds.get(name, 0) + 1
+        return entry
+
+    def current(self, name):
+        """The Dataset currently held for `name`, or None."""
+        return self._entries.get(name)
+
+    def discard(self, match=lambda name: True):
+        """Drop the entries whose names satisfy `match`."""
+        with self._lock:
+            for name in [n for n in self._entries if match(n)]:
+                del self._entries[name]
+
+    def stats(self):
+        """One row per dataset: version, age, build time, rows, bytes and number of builds."""
+        now = time.time()
+        with self._lock:
+            entries = list(self._entries.values())
+            builds = dict(self._builds)
+        return pd.DataFrame([{
+            "dataset": entry.name if isinstance(entry.name, str) else " / ".join(map(str, entry.name)),
+            "version": str(entry.version),
+            "age_s": now - entry.loaded_at,
+            "load_s": entry.load_seconds,
+            "rows": entry.rows,
+            "bytes": entry.nbytes,
+            "builds": builds.get(entry.name, 0),
+        } for entry in entries])
+
+
+datasets = DatasetStore()
@@ -0,0 +1,60 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Formats seen in purchase_report.PO Date, tried in this order; migrations/004
+# parses the same formats in SQL, so change both together
+PO_DATE_FORMATS = ['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S']
+# Last resort: a YYYY-MM-DD date embedded in other text
+ISO_DATE_IN_TEXT = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+
+def parse_dates(values, formats=PO_DATE_FORMATS, extract_iso=True, stats=None):
+    """Parse a column of dates written in several formats into datetime64.
+
+    Each distinct value is parsed once (dates repeat heavily, so this is far
+    less work than parsing every row) and the results are mapped back to the
+    rows by position. Formats are tried in order on whatever is still
+    unparsed; with `extract_iso` a YYYY-MM-DD substring is tried last.
+    Unparseable values become NaT.
+
+    If `stats` is a dict it is filled with row counts per format:
+    {format: {"parsed": n, "failed": n}} where "failed" counts rows still
+    unparsed after that format, plus "unique_values" and "unparsed" totals.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=text.index, dtype='datetime64[ns]')
+
+    steps = [(fmt, fmt) for fmt in formats]
+    if extract_iso:
+        steps.append(('iso-in-text', None))
+    for name, fmt in steps:
+        todo = parsed.isna()
+        if not todo.any():
+            break
+        if fmt is None:
+            candidates = text[todo].str.extract(ISO_DATE_IN_TEXT)[0]
+            attempt = pd.to_datetime(candidates, format='%Y-%m-%d', errors='coerce')
+        else:
+            attempt = pd.to_datetime(text[todo], format=fmt, errors='coerce')
+        parsed[todo] = attempt
+        if stats is not None:
+            now_parsed = attempt.notna()
+            stats[name] = {
+                "parsed": int(counts[now_parsed[now_parsed].index].sum()),
+                "failed": int(counts[now_parsed[~now_parsed].index].sum()),
+            }
+
+    result = parsed.to_numpy().take(np.where(codes >= 0, codes, 0))
+    result[codes < 0] = np.datetime64('NaT')
+    if stats is not None:
+        stats["unique_values"] = len(uniques)
+        stats["unparsed"] = int(counts[parsed.isna().to_numpy()].sum() + (codes < 0).sum())
+    return pd.Series(result, index=series.index, name=series.name)
@@ -0,0 +1,80 @@
+"""Keep trend charts within a point budget: coarser periods first, then LTTB."""
+import numpy as np
+import pandas as pd
+
+POINT_BUDGET = 1000  # points per chart, shared between its series
+MIN_SERIES_POINTS = 50  # never thin a single series below this
+
+# (label, pandas period frequency), finest first
+GRANULARITIES = [("Daily", "D"), ("Weekly", "W"), ("Monthly", "M")]
+
+
+def choose_granularity(start, end, max_points=POINT_BUDGET):
+    """Finest of day/week/month giving at most `max_points` periods between two dates."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    for label, freq in GRANULARITIES:
+        if len(pd.period_range(start, end, freq=freq)) <= max_points:
+            return label, freq
+    return GRANULARITIES[-1]
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: positions of `threshold` points that keep the shape of y(x).
+
+    `x` must be sorted. The first and last points are always kept; each bucket
+    in between contributes the point forming the largest triangle with the
+    point kept before it and the average of the next bucket.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def downsample_trend(data, date_column, value_column, group_column=None,
+                     start=None, end=None, max_points=POINT_BUDGET):
+    """Aggregate a trend for charting within a point budget.
+
+    Sums `value_column` per day, week or month (the finest that fits
+    `max_points` periods per series over start..end, defaulting to the data's
+    own range), then thins any series still over budget with LTTB. Returns
+    (frame sorted by date, granularity label); dates are period starts.
+    """
+    data = data.dropna(subset=[date_column])
+    if data.empty:
+        return data[[c for c in (group_column, date_column, value_column) if c]], GRANULARITIES[0][0]
+
+    groups = data[group_column].nunique() if group_column else 1
+    per_series = max(MIN_SERIES_POINTS, max_points // max(groups, 1))
+    start = data[date_column].min() if start is None else start
+    end = data[date_column].max() if end is None else end
+    label, freq = choose_granularity(start, end, per_series)
+
+    keys = [group_column] if group_column else []
+    period = data[date_column].dt.to_period(freq).dt.start_time.rename(date_column)
+    trend = (
+        data.groupby(keys + [period], observed=True, sort=True)[value_column]
+        .sum()
+        .reset_index()
+    )
+
+    if group_column:
+        parts = [part.iloc[lttb(part[date_column].to_numpy('int64'), part[value_column], per_series)]
+                 for _, part in trend.groupby(group_column, observed=True, sort=False)]
+        trend = pd.concat(parts, ignore_index=True) if parts else trend
+    else:
+        trend = trend.iloc[lttb(trend[date_column].to_numpy('int64'), trend[value_column], per_series)]
+    return trend.reset_index(drop=True), label
@@ -0,0 +1,262 @@
+"""Bulk-load sales exports into sales_by_person.
+
+Usage:
+    python import_sales.py "dumps/Copy of analysis.csv"
+    python import_sales.py dumps/Normalized_Sales_Data_for_DB_Import.csv --load-data
+    python import_sales.py dumps/normalized_sales_data_for_db_import.sql --dry-run
+
+Three layouts are understood (picked from the file, or forced with --format):
+  wide        Salesperson, CustomerName, then one column per month ("Jan-23")
+  normalized  salesperson_name, client_name, month_year ("23-Jan"), total_amount
+  sql         phpMyAdmin dump with INSERT ... VALUES tuples
+
+Files are read in chunks so memory stays bounded. Rows are upserted on
+(salesperson_name, client_name, month_year) (see migrations/003): the first
+occurrence of a key in a run replaces the stored amount, later occurrences in
+the same run are added to it. The keys a run has written are tracked in a
+temporary table on the server, not in this process. The sales rollups are
+refreshed at the end.
+"""
+import argparse
+import os
+import re
+import tempfile
+import time
+
+import mysql.connector
+import pandas as pd
+
+from conn import MySQLDatabase, period_from_month_year
+
+COLUMNS = ['salesperson_name', 'client_name', 'month_year', 'total_amount']
+KEY = ['salesperson_name', 'client_name', 'month_year']
+
+STAGE_COLUMNS = ['salesperson_name', 'client_name', 'month_year', 'period', 'total_amount']
+UPSERT_SQL = """
+    INSERT INTO sales_by_person (salesperson_name, client_name, month_year, period, total_amount)
+    SELECT s.salesperson_name, s.client_name, s.month_year, s.period, s.total_amount
+    FROM sales_import_stage s
+    WHERE {seen} EXISTS (
+        SELECT 1 FROM sales_import_seen k
+        WHERE k.salesperson_name = s.salesperson_name AND k.client_name = s.client_name
+          AND k.month_year = s.month_year
+    )
+    ON DUPLICATE KEY UPDATE period = VALUES(period), total_amount = {amount}
+"""
+REPLACE_AMOUNT = "VALUES(total_amount)"
+ADD_AMOUNT = "total_amount + VALUES(total_amount)"
+
+INSERT_HEADER = re.compile(r"^INSERT INTO\s+`?\w+`?\s*\(([^)]*)\)\s*VALUES\s*(.*)$", re.IGNORECASE)
+SQL_VALUE = re.compile(r"'((?:[^'\\]|\\.|'')*)'|(NULL)|(-?\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def parse_amount(values):
+    """Vectorized parse of "17,400.00000"-style strings; blanks and junk become NaN."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+    return pd.to_numeric(values.astype('string').str.replace(',', '', regex=False).str.strip(),
+                         errors='coerce')
+
+
+def wide_month_label(column):
+    """'Jan-23' (spreadsheet header) -> '23-Jan' (month_year), or None for non-month columns."""
+    parsed = pd.to_datetime(column, format='%b-%y', errors='coerce')
+    return None if pd.isna(parsed) else parsed.strftime('%y-%b')
+
+
+def detect_format(path):
+    if path.lower().endswith('.sql'):
+        return 'sql'
+    header = pd.read_csv(path, nrows=0).columns
+    return 'normalized' if set(COLUMNS) <= set(header) else 'wide'
+
+
+def read_wide(path, chunksize):
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        months = {c: wide_month_label(c) for c in chunk.columns[2:]}
+        months = {c: label for c, label in months.items() if label}
+        long = chunk.melt(id_vars=list(chunk.columns[:2]), value_vars=list(months),
+                          var_name='month_year', value_name='total_amount')
+        long.columns = COLUMNS
+        long['month_year'] = long['month_year'].map(months)
+        yield long
+
+
+def read_normalized(path, chunksize):
+    for chunk in pd.read_csv(path, dtype=str, usecols=COLUMNS, chunksize=chunksize):
+        yield chunk[COLUMNS]
+
+
+def read_sql_dump(path, chunksize):
+    """Stream the VALUES tuples of INSERT statements in a mysqldump/phpMyAdmin file."""
+    columns, rows = None, []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            header = INSERT_HEADER.match(line)
+            if header:
+                columns = [c.strip(' `') for c in header.group(1).split(',')]
+                line = header.group(2).strip()
+            if columns is None or not line.startswith('('):
+                continue
+            # A line holds one tuple, or several for single-line INSERTs
+            for values in re.findall(r"\((?:'(?:[^'\\]|\\.|'')*'|[^()'])*\)", line):
+                row = []
+                for text, null, number in SQL_VALUE.findall(values):
+                    if null:
+                        row.append(None)
+                    elif number:
+                        row.append(number)
+                    else:
+                        row.append(text.replace("''", "'").replace("\\'", "'").replace('\\\\', '\\'))
+                rows.append(dict(zip(columns, row)))
+            if line.endswith(';'):
+                columns = None
+            if len(rows) >= chunksize:
+                yield pd.DataFrame(rows, columns=COLUMNS)
+                rows = []
+    if rows:
+        yield pd.DataFrame(rows, columns=COLUMNS)
+
+
+READERS = {'wide': read_wide, 'normalized': read_normalized, 'sql': read_sql_dump}
+
+
+def prepare(chunk):
+    """Clean one chunk and sum duplicate keys within it."""
+    chunk = chunk.copy()
+    for column in KEY:
+        chunk[column] = chunk[column].astype('string').str.strip()
+    chunk['total_amount'] = parse_amount(chunk['total_amount'])
+    chunk = chunk.dropna(subset=['total_amount', 'month_year'])
+    chunk = chunk.groupby(KEY, as_index=False, sort=False)['total_amount'].sum()
+    chunk['period'] = period_from_month_year(chunk['month_year']).dt.date.values
+    return chunk[['salesperson_name', 'client_name', 'month_year', 'period', 'total_amount']]
+
+
+def rows_of(frame):
+    frame = frame.astype(object).where(frame.notna(), None)
+    return list(frame.itertuples(index=False, name=None))
+
+
+def create_import_tables(cursor):
+    """Temporary tables for this connection: the chunk being written and the keys written so far."""
+    cursor.execute("""
+        CREATE TEMPORARY TABLE sales_import_stage (
+            salesperson_name VARCHAR(10), client_name VARCHAR(52), month_year VARCHAR(6),
+            period DATE NULL, total_amount DECIMAL(18,5)
+        )
+    """)
+    cursor.execute("""
+        CREATE TEMPORARY TABLE sales_import_seen (
+            salesperson_name VARCHAR(10), client_name VARCHAR(52), month_year VARCHAR(6),
+            UNIQUE KEY uq_import_seen (salesperson_name, client_name, month_year)
+        )
+    """)
+
+
+def stage_executemany(cursor, chunk, batch_size):
+    rows = rows_of(chunk[STAGE_COLUMNS])
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(
+            "INSERT INTO sales_import_stage VALUES (%s, %s, %s, %s, %s)", rows[start:start + batch_size]
+        )
+
+
+def stage_load_data(cursor, chunk, tmpdir):
+    """Stage the chunk with LOAD DATA LOCAL INFILE."""
+    path = os.path.join(tmpdir, 'sales_chunk.csv')
+    chunk[STAGE_COLUMNS].to_csv(path, index=False, header=False, na_rep='\\N', date_format='%Y-%m-%d')
+    cursor.execute(f"""
+        LOAD DATA LOCAL INFILE '{path}' INTO TABLE sales_import_stage
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '\\n'
+    """)
+
+
+def write_chunk(conn, chunk, stage):
+    """Stage one prepared chunk, upsert it and record its keys as written, in one transaction.
+
+    Keys new to the run replace the stored amount and keys already written
+    by it add to it. The split is a NOT EXISTS / EXISTS against
+    sales_import_seen, so Python never holds more than the current chunk.
+    """
+    cursor = conn.cursor()
+    cursor.execute("TRUNCATE TABLE sales_import_stage")
+    stage(cursor, chunk)
+    for seen, amount in (("NOT", REPLACE_AMOUNT), ("", ADD_AMOUNT)):
+        cursor.execute(UPSERT_SQL.format(seen=seen, amount=amount))
+    # prepare() drops rows with a missing key, so the unique key catches every repeat
+    cursor.execute("""
+        INSERT IGNORE INTO sales_import_seen (salesperson_name, client_name, month_year)
+        SELECT salesperson_name, client_name, month_year FROM sales_import_stage
+    """)
+    conn.commit()
+    cursor.close()
+
+
+def count_written_keys(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM sales_import_seen")
+    (count,) = cursor.fetchone()
+    cursor.close()
+    return count
+
+
+def import_file(path, fmt='auto', chunksize=100000, batch_size=5000, load_data=False, dry_run=False):
+    fmt = detect_format(path) if fmt == 'auto' else fmt
+    print(f"Importing {path} ({fmt})")
+    db = MySQLDatabase()
+    conn = None
+    tmpdir = tempfile.mkdtemp() if load_data else None
+    if load_data:
+        stage = lambda cursor, chunk: stage_load_data(cursor, chunk, tmpdir)
+    else:
+        stage = lambda cursor, chunk: stage_executemany(cursor, chunk, batch_size)
+    if not dry_run:
+        config = dict(db.pool.config)
+        if load_data:
+            config.update(allow_local_infile=True, allow_local_infile_in_path=tmpdir)
+        conn = mysql.connector.connect(**config)
+        cursor = conn.cursor()
+        create_import_tables(cursor)
+        cursor.close()
+
+    read = written = 0
+    keys = None
+    started = time.perf_counter()
+    try:
+        for chunk in READERS[fmt](path, chunksize):
+            read += len(chunk)
+            prepared = prepare(chunk)
+            if conn is not None:
+                write_chunk(conn, prepared, stage)
+            written += len(prepared)
+            elapsed = time.perf_counter() - started
+            print(f"  {read:>12,} rows read  {written:>12,} upserted  {read / elapsed:>10,.0f} rows/s")
+        if conn is not None:
+            keys = count_written_keys(conn)
+    finally:
+        if conn is not None:
+            conn.close()
+
+    elapsed = time.perf_counter() - started
+    distinct = f", {keys:,} distinct keys" if keys is not None else ""
+    print(f"Done: {read:,} rows read, {written:,} upserted{distinct} "
+          f"in {elapsed:.1f}s ({read / elapsed if elapsed else 0:,.0f} rows/s)")
+    if not dry_run:
+        months = db.refresh_sales_rollup()
+        print(f"Refreshed sales rollups for {months} month(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--format", choices=["auto", *READERS], default="auto")
+    parser.add_argument("--chunksize", type=int, default=100000, help="rows read per chunk")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per executemany batch")
+    parser.add_argument("--load-data", action="store_true", help="stage chunks with LOAD DATA LOCAL INFILE")
+    parser.add_argument("--dry-run", action="store_true", help="parse and report without writing")
+    args = parser.parse_args()
+    for file in args.files:
+        import_file(file, args.format, args.chunksize, args.batch_size, args.load_data, args.dry_run)
@@ -0,0 +1,150 @@
+"""Process-wide timing of database queries and page sections.
+
+MySQLDatabase records every query it sends (latency, rows, result bytes and
+the time spent waiting for a pooled connection); pages wrap their load, clean,
+aggregate and chart steps in page_timer(). Queries slower than
+SLOW_QUERY_SECONDS are written to the slow-query log, and failed queries are
+kept with their SQL and error. pages/7_Diagnostics.py shows the percentiles
+and exports the raw samples.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+SLOW_QUERY_SECONDS = 1.0                        # queries at least this slow are logged
+SLOW_QUERY_LOG = os.path.join(".cache", "slow_queries.log")  # None to log to stderr only
+MAX_SAMPLES = 1000                              # most recent samples kept per query / section
+
+slow_query_log = logging.getLogger("colorlabels.slow_queries")
+
+
+def _configure_slow_query_log():
+    if slow_query_log.handlers:
+        return
+    if SLOW_QUERY_LOG:
+        os.makedirs(os.path.dirname(SLOW_QUERY_LOG) or ".", exist_ok=True)
+        handler = logging.FileHandler(SLOW_QUERY_LOG, encoding="utf-8")
+    else:
+        handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_log.addHandler(handler)
+    slow_query_log.setLevel(logging.WARNING)
+    slow_query_log.propagate = False
+
+
+class Recorder:
+    """Thread-safe store of recent query and page-section samples."""
+
+    def __init__(self, max_samples=MAX_SAMPLES):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._queries = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._sections = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._slow = deque(maxlen=self.max_samples)
+        self._failed = deque(maxlen=self.max_samples)
+        self.started = time.time()
+
+    def record_query(self, name, seconds, rows=0, nbytes=0, acquire_seconds=0.0, sql=None, error=None):
+        sample = {"at": time.time(), "seconds": seconds, "rows": rows, "bytes": nbytes,
+                  "acquire_seconds": acquire_seconds, "error": error}
+        slow = seconds >= SLOW_QUERY_SECONDS
+        with self._lock:
+            self._queries[name].append(sample)
+            if slow:
+                self._slow.append({"query": name, **sample, "sql": sql})
+            if error is not None:
+                self._failed.append({"query": name, **sample, "sql": sql})
+        if slow:
+            _configure_slow_query_log()
+            statement = " ".join((sql or "").split())
+            slow_query_log.warning("%.3fs %s rows=%d bytes=%d acquire=%.3fs %s",
+                                   seconds, name, rows, nbytes, acquire_seconds, statement)
+
+    def record_section(self, page, section, seconds):
+        with self._lock:
+            self._sections[(page, section)].append({"at": time.time(), "seconds": seconds})
+
+    def query_stats(self):
+        """One row per query: count and p50/p95/p99/max latency, mean rows/bytes, p95 acquire time."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._queries.items()}
+        rows = []
+        for name, values in samples.items():
+            seconds = np.array([s["seconds"] for s in values])
+            rows.append({
+                "query": name,
+                "count": len(values),
+                **_percentiles(seconds),
+                "mean_rows": float(np.mean([s["rows"] for s in values])),
+                "mean_bytes": float(np.mean([s["bytes"] for s in values])),
+                "acquire_p95_s": float(np.percentile([s["acquire_seconds"] for s in values], 95)),
+                "errors": sum(s["error"] is not None for s in values),
+            })
+        return pd.DataFrame(rows).sort_values("p95_s", ascending=False) if rows else pd.DataFrame()
+
+    def section_stats(self):
+        """One row per (page, section): count and p50/p95/p99/max latency."""
+        with self._lock:
+            samples = {key: list(values) for key, values in self._sections.items()}
+        rows = [{"page": page, "section": section, "count": len(values),
+                 **_percentiles(np.array([s["seconds"] for s in values]))}
+                for (page, section), values in samples.items()]
+        return pd.DataFrame(rows).sort_values(["page", "section"]) if rows else pd.DataFrame()
+
+    def slow_queries(self):
+        with self._lock:
+            return pd.DataFrame(list(self._slow))
+
+    def failed_queries(self):
+        with self._lock:
+            return pd.DataFrame(list(self._failed))
+
+    def export(self):
+        """Every retained sample, for download or offline analysis."""
+        with self._lock:
+            return {
+                "started": self.started,
+                "exported": time.time(),
+                "slow_query_seconds": SLOW_QUERY_SECONDS,
+                "queries": {name: list(values) for name, values in self._queries.items()},
+                "sections": [{"page": page, "section": section, "samples": list(values)}
+                             for (page, section), values in self._sections.items()],
+                "slow_queries": list(self._slow),
+                "failed_queries": list(self._failed),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._queries.clear()
+            self._sections.clear()
+            self._slow.clear()
+            self._failed.clear()
+            self.started = time.time()
+
+
+def _percentiles(seconds):
+    return {
+        "p50_s": float(np.percentile(seconds, 50)),
+        "p95_s": float(np.percentile(seconds, 95)),
+        "p99_s": float(np.percentile(seconds, 99)),
+        "max_s": float(seconds.max()),
+    }
+
+
+recorder = Recorder()
+
+
+@contextmanager
+def page_timer(page, section):
+    """Time a block of a page: `with page_timer("Purchase Analysis", "load"): ...`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.record_section(page, section, time.perf_counter() - start)
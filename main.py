@@ -1,40 +1,57 @@
 import streamlit as st
-from conn import MySQLDatabase
+from conn import MySQLDatabase, sales_kpis
+from datastore import enable_copy_on_write
+import refresher
+from instrumentation import page_timer
+from paged_table import paged_table
 import plotly.express as px
-import pandas as pd
 
+# pandas copy-on-write for this whole process: shared datasets are then handed to
+# sessions as shallow copies instead of deep ones (see datastore.share)
+enable_copy_on_write()
 
 # Streamlit App
 st.title("Sales Dashboard")
 db = MySQLDatabase()
+refresher.start()  # keeps shared data warm in the background (once per process)
 
-# Load data
-sales_data = db.load_sales_data()
-
-# Filter Options
-salespersons = sales_data['salesperson_name'].unique()
-clients = sales_data['client_name'].unique()
-months = sales_data['month_year'].unique()
+# Filter Options (served from the small rollup tables)
+with page_timer("Sales Dashboard", "load filter options"):
+    options = db.fetch_sales_filter_options()
+salespersons = options['salespersons']
+clients = options['clients']
+months = options['months']
 
 # Sidebar filters
 selected_salesperson = st.sidebar.selectbox("Select Salesperson", ["All"] + list(salespersons))
 selected_client = st.sidebar.selectbox("Select Client", ["All"] + list(clients))
 selected_month = st.sidebar.selectbox("Select Month", ["All"] + list(months))
 
-# Filter data
-filtered_data = sales_data.copy()
-if selected_salesperson != "All":
-    filtered_data = filtered_data[filtered_data['salesperson_name'] == selected_salesperson]
-if selected_client != "All":
-    filtered_data = filtered_data[filtered_data['client_name'] == selected_client]
-if selected_month != "All":
-    filtered_data = filtered_data[filtered_data['month_year'] == selected_month]
+# Filters pushed down to the database ("All" means no filter)
+sales_filters = {
+    "salesperson": None if selected_salesperson == "All" else selected_salesperson,
+    "client": None if selected_client == "All" else selected_client,
+    "month": None if selected_month == "All" else selected_month,
+}
+
+# Run the independent dashboard queries in parallel
+with page_timer("Sales Dashboard", "load"):
+    results = db.run_concurrently({
+        "sales_trend": lambda: db.fetch_monthly_sales_trend(**sales_filters),
+        "top_salespersons": lambda: db.fetch_top_salespersons(**sales_filters),
+        "top_clients": lambda: db.fetch_top_clients(**sales_filters),
+    })
 
 # KPIs
 st.header("Key Performance Indicators")
-total_sales = filtered_data['total_amount'].sum()
-top_salesperson = filtered_data.groupby('salesperson_name')['total_amount'].sum().idxmax()
-top_client = filtered_data.groupby('client_name')['total_amount'].sum().idxmax()
+sales_trend = results['sales_trend']
+top_salespersons = results['top_salespersons']
+top_clients = results['top_clients']
+# Same figures as db.fetch_sales_kpis, taken from the results already loaded
+kpis = sales_kpis(sales_trend, top_salespersons, top_clients)
+total_sales = kpis['total_sales']
+top_salesperson = kpis['top_salesperson']
+top_client = kpis['top_client']
 
 
 st.markdown(f"<h3 style='font-size:24px;'>Total Sales: <span style='color:green;'>Ksh{total_sales:,.2f}</span></h3>", unsafe_allow_html=True)
@@ -44,15 +61,10 @@ st.markdown(f"<h3 style='font-size:24px;'>Top Client: <span style='color:green;'
 
 # Monthly Sales Trends
 st.header("Monthly Sales Trends")
-if not filtered_data.empty:
-    sales_trend = filtered_data.groupby('month_year')['total_amount'].sum().reset_index()
-
-    # Correct parsing of `month_year` in the format `YY-MMM` (e.g., 23-Apr)
-    sales_trend['month_year'] = pd.to_datetime(sales_trend['month_year'], format='%y-%b')
-    
-    # Sort by parsed dates
-    sales_trend = sales_trend.sort_values('month_year')
-    fig = px.line(sales_trend, x='month_year', y='total_amount', title="Sales Over Time")
+if not sales_trend.empty:
+    # `period` is the first day of each month, already sorted by the query
+    fig = px.line(sales_trend, x='period', y='total_amount', title="Sales Over Time",
+                  labels={'period': 'month_year'})
     st.plotly_chart(fig)
 else:
     st.write("No data available for the selected filters.")
@@ -60,9 +72,7 @@ else:
 
 # Top Salespersons
 st.header("Top Salespersons")
-if not filtered_data.empty:
-    top_salespersons = filtered_data.groupby('salesperson_name')['total_amount'].sum().reset_index()
-    top_salespersons = top_salespersons.sort_values('total_amount', ascending=False)
+if not top_salespersons.empty:
     fig = px.bar(top_salespersons, x='salesperson_name', y='total_amount', title="Top Salespersons")
     st.plotly_chart(fig)
 else:
@@ -70,14 +80,16 @@ else:
 
 # Top Clients
 st.header("Top Clients")
-if not filtered_data.empty:
-    top_clients = filtered_data.groupby('client_name')['total_amount'].sum().reset_index()
-    top_clients = top_clients.sort_values('total_amount', ascending=False)
+if not top_clients.empty:
     fig = px.bar(top_clients, x='client_name', y='total_amount', title="Top Clients")
     st.plotly_chart(fig)
 else:
     st.write("No data available for the selected filters.")
 
-# Display Filtered Data
+# Display Filtered Data (one page at a time, sorted and filtered in MySQL)
 st.header("Filtered Sales Data")
-st.dataframe(filtered_data)
\ No newline at end of file
+paged_table(db, "sales_by_person", filters={
+    "salesperson_name": sales_filters["salesperson"],
+    "client_name": sales_filters["client"],
+    "month_year": sales_filters["month"],
+})
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""Apply the SQL files in migrations/ to the database, in file-name order.
+
+Usage:
+    python migrate.py           # apply pending migrations
+    python migrate.py --list    # show applied / pending migrations
+
+Migration files use the same syntax as the mysql command-line client,
+including DELIMITER blocks for triggers and procedures.
+"""
+import argparse
+import os
+
+from conn import MySQLDatabase
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def split_statements(sql):
+    """Split a migration script into statements, honouring DELIMITER changes."""
+    statements = []
+    delimiter = ";"
+    buffer = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(buffer).strip()
+            statements.append(statement[: -len(delimiter)].strip())
+            buffer = []
+    if "".join(buffer).strip():
+        statements.append("\n".join(buffer).strip())
+    return statements
+
+
+def list_migrations():
+    return sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql"))
+
+
+def applied_migrations(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name VARCHAR(255) PRIMARY KEY,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    cursor.execute("SELECT name FROM schema_migrations;")
+    return {name for (name,) in cursor.fetchall()}
+
+
+def migrate(show_only=False, db=None):
+    db = db or MySQLDatabase()
+    with db.pool.connection() as conn:
+        cursor = conn.cursor()
+        done = applied_migrations(cursor)
+        for name in list_migrations():
+            if name in done:
+                print(f"applied  {name}")
+                continue
+            if show_only:
+                print(f"pending  {name}")
+                continue
+            print(f"applying {name} ...")
+            with open(os.path.join(MIGRATIONS_DIR, name), encoding="utf-8") as f:
+                for statement in split_statements(f.read()):
+                    cursor.execute(statement)
+            cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s);", (name,))
+        cursor.close()
+    db.clear_cache()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--list", action="store_true", help="only show migration status")
+    args = parser.parse_args()
+    migrate(show_only=args.list)
@@ -0,0 +1,84 @@
+-- Typed month key for sales_by_person.
+--
+-- month_year is stored as a 'YY-Mon' string (e.g. '23-Jan'), so every year or
+-- range filter had to wrap it in STR_TO_DATE and scan the whole table. `period`
+-- holds the first day of that month as a DATE and is indexed together with the
+-- entity columns; total_amount is included so per-entity monthly sums are
+-- answered from the index alone.
+--
+-- Every statement can be re-run, so a migration that stopped part way through
+-- can simply be applied again.
+
+SET @add_period = IF(
+    (SELECT COUNT(*) FROM information_schema.COLUMNS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'sales_by_person'
+       AND COLUMN_NAME = 'period') = 0,
+    'ALTER TABLE sales_by_person ADD COLUMN period DATE NULL AFTER month_year',
+    'DO 0'
+);
+PREPARE add_period FROM @add_period;
+EXECUTE add_period;
+DEALLOCATE PREPARE add_period;
+
+UPDATE sales_by_person
+SET period = STR_TO_DATE(CONCAT(month_year, '-01'), '%y-%b-%d')
+WHERE period IS NULL;
+
+SET @add_client_index = IF(
+    (SELECT COUNT(*) FROM information_schema.STATISTICS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'sales_by_person'
+       AND INDEX_NAME = 'idx_sales_client_period') = 0,
+    'CREATE INDEX idx_sales_client_period ON sales_by_person (client_name, period, total_amount)',
+    'DO 0'
+);
+PREPARE add_client_index FROM @add_client_index;
+EXECUTE add_client_index;
+DEALLOCATE PREPARE add_client_index;
+
+SET @add_salesperson_index = IF(
+    (SELECT COUNT(*) FROM information_schema.STATISTICS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'sales_by_person'
+       AND INDEX_NAME = 'idx_sales_salesperson_period') = 0,
+    'CREATE INDEX idx_sales_salesperson_period ON sales_by_person (salesperson_name, period, total_amount)',
+    'DO 0'
+);
+PREPARE add_salesperson_index FROM @add_salesperson_index;
+EXECUTE add_salesperson_index;
+DEALLOCATE PREPARE add_salesperson_index;
+
+SET @add_period_index = IF(
+    (SELECT COUNT(*) FROM information_schema.STATISTICS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'sales_by_person'
+       AND INDEX_NAME = 'idx_sales_period') = 0,
+    'CREATE INDEX idx_sales_period ON sales_by_person (period)',
+    'DO 0'
+);
+PREPARE add_period_index FROM @add_period_index;
+EXECUTE add_period_index;
+DEALLOCATE PREPARE add_period_index;
+
+-- Keep period filled for loaders that only write month_year.
+DROP TRIGGER IF EXISTS sales_by_person_period_insert;
+DROP TRIGGER IF EXISTS sales_by_person_period_update;
+
+DELIMITER $$
+
+CREATE TRIGGER sales_by_person_period_insert
+BEFORE INSERT ON sales_by_person
+FOR EACH ROW
+BEGIN
+    IF NEW.period IS NULL THEN
+        SET NEW.period = STR_TO_DATE(CONCAT(NEW.month_year, '-01'), '%y-%b-%d');
+    END IF;
+END$$
+
+CREATE TRIGGER sales_by_person_period_update
+BEFORE UPDATE ON sales_by_person
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.month_year <=> OLD.month_year) AND NEW.period <=> OLD.period THEN
+        SET NEW.period = STR_TO_DATE(CONCAT(NEW.month_year, '-01'), '%y-%b-%d');
+    END IF;
+END$$
+
+DELIMITER ;
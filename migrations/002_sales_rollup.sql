@@ -0,0 +1,101 @@
+-- Pre-aggregated sales rollups.
+--
+-- sales_rollup_monthly holds one row per salesperson x client x month; the
+-- month and per-entity tables are rolled up from it. Triggers on
+-- sales_by_person record the months touched by any write in
+-- sales_rollup_dirty, and MySQLDatabase.refresh_sales_rollup() recomputes only
+-- those months. The tables must be InnoDB so a refresh is atomic.
+--
+-- Every statement can be re-run, so a migration that stopped part way through
+-- can simply be applied again: the rollups are refilled from scratch.
+
+CREATE TABLE IF NOT EXISTS sales_rollup_monthly (
+    salesperson_name VARCHAR(10) NULL,
+    client_name VARCHAR(52) NULL,
+    period DATE NULL,
+    month_year VARCHAR(6) NULL,
+    total_amount DECIMAL(18,5) NOT NULL,
+    row_count INT NOT NULL,
+    KEY idx_rollup_period (period),
+    KEY idx_rollup_salesperson_period (salesperson_name, period),
+    KEY idx_rollup_client_period (client_name, period)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS sales_rollup_month (
+    period DATE NULL,
+    month_year VARCHAR(6) NULL,
+    total_amount DECIMAL(18,5) NOT NULL,
+    row_count INT NOT NULL,
+    KEY idx_rollup_month_period (period)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS sales_rollup_salesperson (
+    salesperson_name VARCHAR(10) NULL,
+    total_amount DECIMAL(18,5) NOT NULL,
+    KEY idx_rollup_salesperson_total (total_amount)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS sales_rollup_client (
+    client_name VARCHAR(52) NULL,
+    total_amount DECIMAL(18,5) NOT NULL,
+    KEY idx_rollup_client_total (total_amount)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS sales_rollup_dirty (
+    period DATE NULL,
+    UNIQUE KEY uq_rollup_dirty_period (period)
+) ENGINE=InnoDB;
+
+DELETE FROM sales_rollup_monthly;
+DELETE FROM sales_rollup_month;
+DELETE FROM sales_rollup_salesperson;
+DELETE FROM sales_rollup_client;
+
+INSERT INTO sales_rollup_monthly
+SELECT salesperson_name, client_name, period, MIN(month_year), COALESCE(SUM(total_amount), 0), COUNT(*)
+FROM sales_by_person
+GROUP BY period, salesperson_name, client_name;
+
+INSERT INTO sales_rollup_month
+SELECT period, MIN(month_year), SUM(total_amount), SUM(row_count)
+FROM sales_rollup_monthly
+GROUP BY period;
+
+INSERT INTO sales_rollup_salesperson
+SELECT salesperson_name, SUM(total_amount)
+FROM sales_rollup_monthly
+GROUP BY salesperson_name;
+
+INSERT INTO sales_rollup_client
+SELECT client_name, SUM(total_amount)
+FROM sales_rollup_monthly
+GROUP BY client_name;
+
+DROP TRIGGER IF EXISTS sales_by_person_rollup_insert;
+DROP TRIGGER IF EXISTS sales_by_person_rollup_update;
+DROP TRIGGER IF EXISTS sales_by_person_rollup_delete;
+
+DELIMITER $$
+
+CREATE TRIGGER sales_by_person_rollup_insert
+AFTER INSERT ON sales_by_person
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO sales_rollup_dirty (period) VALUES (NEW.period);
+END$$
+
+CREATE TRIGGER sales_by_person_rollup_update
+AFTER UPDATE ON sales_by_person
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO sales_rollup_dirty (period) VALUES (OLD.period), (NEW.period);
+END$$
+
+CREATE TRIGGER sales_by_person_rollup_delete
+AFTER DELETE ON sales_by_person
+FOR EACH ROW
+BEGIN
+    INSERT IGNORE INTO sales_rollup_dirty (period) VALUES (OLD.period);
+END$$
+
+DELIMITER ;
@@ -0,0 +1,48 @@
+-- One row per salesperson x client x month in sales_by_person.
+--
+-- Existing duplicates are merged by summing their amounts (totals are
+-- unchanged), then a unique key is added so import_sales.py can upsert.
+--
+-- Every statement can be re-run, so a migration that stopped part way through
+-- can simply be applied again. The merged rows are kept in
+-- sales_by_person_duplicates until they are back in sales_by_person, and the
+-- table is only filled when it is empty, so a re-run after the DELETE below
+-- restores them instead of losing them.
+
+CREATE TABLE IF NOT EXISTS sales_by_person_duplicates AS
+SELECT salesperson_name, client_name, month_year, MIN(period) AS period, SUM(total_amount) AS total_amount
+FROM sales_by_person
+GROUP BY salesperson_name, client_name, month_year
+LIMIT 0;
+
+INSERT INTO sales_by_person_duplicates
+SELECT salesperson_name, client_name, month_year, MIN(period), SUM(total_amount)
+FROM sales_by_person
+WHERE NOT EXISTS (SELECT 1 FROM sales_by_person_duplicates)
+GROUP BY salesperson_name, client_name, month_year
+HAVING COUNT(*) > 1;
+
+DELETE s
+FROM sales_by_person s
+JOIN sales_by_person_duplicates d
+  ON s.salesperson_name <=> d.salesperson_name
+ AND s.client_name <=> d.client_name
+ AND s.month_year <=> d.month_year;
+
+INSERT INTO sales_by_person (salesperson_name, client_name, month_year, period, total_amount)
+SELECT salesperson_name, client_name, month_year, period, total_amount
+FROM sales_by_person_duplicates;
+
+DROP TABLE IF EXISTS sales_by_person_duplicates;
+
+SET @add_unique_key = IF(
+    (SELECT COUNT(*) FROM information_schema.STATISTICS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'sales_by_person'
+       AND INDEX_NAME = 'uq_sales_person_client_month') = 0,
+    'ALTER TABLE sales_by_person
+         ADD UNIQUE KEY uq_sales_person_client_month (salesperson_name, client_name, month_year)',
+    'DO 0'
+);
+PREPARE add_unique_key FROM @add_unique_key;
+EXECUTE add_unique_key;
+DEALLOCATE PREPARE add_unique_key;
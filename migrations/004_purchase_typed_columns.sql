@@ -0,0 +1,88 @@
+-- Typed numeric and date columns for purchase_report.
+--
+-- Amount, Rate, Qty and Pending Qty were comma-formatted strings and PO Date a
+-- free-form varchar, so every load parsed them in Python. Rows holding values
+-- that cannot be parsed are copied unchanged to purchase_report_quarantine with
+-- the offending columns listed; in purchase_report those values become NULL,
+-- which the loaders already treated as 0 / NaT.
+--
+-- PO Date accepts the formats in date_utils.PO_DATE_FORMATS, tried in the same
+-- order, then a YYYY-MM-DD date inside other text; keep the two in step.
+--
+-- Every statement can be re-run, so a migration that stopped part way through
+-- can simply be applied again.
+
+SET @saved_sql_mode = @@SESSION.sql_mode;
+-- Let STR_TO_DATE return NULL for impossible dates instead of failing the UPDATE
+SET SESSION sql_mode = REPLACE(REPLACE(@@SESSION.sql_mode, 'STRICT_TRANS_TABLES', ''), 'STRICT_ALL_TABLES', '');
+
+CREATE TABLE IF NOT EXISTS purchase_report_quarantine LIKE purchase_report;
+
+SET @add_columns = IF(
+    (SELECT COUNT(*) FROM information_schema.COLUMNS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'purchase_report_quarantine'
+       AND COLUMN_NAME = 'quarantine_reason') = 0,
+    'ALTER TABLE purchase_report_quarantine
+         ADD COLUMN quarantine_reason VARCHAR(255) NULL,
+         ADD COLUMN quarantined_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP',
+    'DO 0'
+);
+PREPARE add_columns FROM @add_columns;
+EXECUTE add_columns;
+DEALLOCATE PREPARE add_columns;
+
+-- HAVING filters on the computed reason without a derived table, so the row is
+-- purchase_report's own columns plus the two quarantine columns. Skipped if an
+-- earlier attempt already filled the quarantine.
+INSERT INTO purchase_report_quarantine
+SELECT purchase_report.*, CONCAT_WS(', ',
+    IF(TRIM(COALESCE(`Amount`, '')) <> '' AND REPLACE(TRIM(`Amount`), ',', '') NOT REGEXP '^-?[0-9]+([.][0-9]+)?$', 'Amount', NULL),
+    IF(TRIM(COALESCE(`Rate`, '')) <> '' AND REPLACE(TRIM(`Rate`), ',', '') NOT REGEXP '^-?[0-9]+([.][0-9]+)?$', 'Rate', NULL),
+    IF(TRIM(COALESCE(`Qty`, '')) <> '' AND REPLACE(TRIM(`Qty`), ',', '') NOT REGEXP '^-?[0-9]+([.][0-9]+)?$', 'Qty', NULL),
+    IF(TRIM(COALESCE(`Pending Qty`, '')) <> '' AND REPLACE(TRIM(`Pending Qty`), ',', '') NOT REGEXP '^-?[0-9]+([.][0-9]+)?$', 'Pending Qty', NULL),
+    IF(TRIM(COALESCE(`PO Date`, '')) <> '' AND COALESCE(
+            IF(TRIM(`PO Date`) REGEXP '^[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}$', STR_TO_DATE(TRIM(`PO Date`), '%Y-%m-%d'), NULL),
+            IF(TRIM(`PO Date`) REGEXP '^[0-9]{1,2}-[0-9]{1,2}-[0-9]{4}$', STR_TO_DATE(TRIM(`PO Date`), '%d-%m-%Y'), NULL),
+            IF(TRIM(`PO Date`) REGEXP '^[0-9]{1,2}/[0-9]{1,2}/[0-9]{4}$', STR_TO_DATE(TRIM(`PO Date`), '%d/%m/%Y'), NULL),
+            IF(TRIM(`PO Date`) REGEXP '^[0-9]{4}-[0-9]{1,2}-[0-9]{1,2} [0-9]{1,2}:[0-9]{2}:[0-9]{2}$',
+               DATE(STR_TO_DATE(TRIM(`PO Date`), '%Y-%m-%d %H:%i:%s')), NULL),
+            STR_TO_DATE(REGEXP_SUBSTR(TRIM(`PO Date`), '[0-9]{4}-[0-9]{2}-[0-9]{2}'), '%Y-%m-%d')
+        ) IS NULL, 'PO Date', NULL)
+) AS quarantine_reason, NOW()
+FROM purchase_report
+WHERE NOT EXISTS (SELECT 1 FROM purchase_report_quarantine)
+HAVING quarantine_reason <> '';
+
+UPDATE purchase_report
+SET `Amount` = IF(REPLACE(TRIM(`Amount`), ',', '') REGEXP '^-?[0-9]+([.][0-9]+)?$', REPLACE(TRIM(`Amount`), ',', ''), NULL),
+    `Rate` = IF(REPLACE(TRIM(`Rate`), ',', '') REGEXP '^-?[0-9]+([.][0-9]+)?$', REPLACE(TRIM(`Rate`), ',', ''), NULL),
+    `Qty` = IF(REPLACE(TRIM(`Qty`), ',', '') REGEXP '^-?[0-9]+([.][0-9]+)?$', REPLACE(TRIM(`Qty`), ',', ''), NULL),
+    `Pending Qty` = IF(REPLACE(TRIM(`Pending Qty`), ',', '') REGEXP '^-?[0-9]+([.][0-9]+)?$', REPLACE(TRIM(`Pending Qty`), ',', ''), NULL),
+    `PO Date` = DATE_FORMAT(COALESCE(
+        IF(TRIM(`PO Date`) REGEXP '^[0-9]{4}-[0-9]{1,2}-[0-9]{1,2}$', STR_TO_DATE(TRIM(`PO Date`), '%Y-%m-%d'), NULL),
+        IF(TRIM(`PO Date`) REGEXP '^[0-9]{1,2}-[0-9]{1,2}-[0-9]{4}$', STR_TO_DATE(TRIM(`PO Date`), '%d-%m-%Y'), NULL),
+        IF(TRIM(`PO Date`) REGEXP '^[0-9]{1,2}/[0-9]{1,2}/[0-9]{4}$', STR_TO_DATE(TRIM(`PO Date`), '%d/%m/%Y'), NULL),
+        IF(TRIM(`PO Date`) REGEXP '^[0-9]{4}-[0-9]{1,2}-[0-9]{1,2} [0-9]{1,2}:[0-9]{2}:[0-9]{2}$',
+           DATE(STR_TO_DATE(TRIM(`PO Date`), '%Y-%m-%d %H:%i:%s')), NULL),
+        STR_TO_DATE(REGEXP_SUBSTR(TRIM(`PO Date`), '[0-9]{4}-[0-9]{2}-[0-9]{2}'), '%Y-%m-%d')
+    ), '%Y-%m-%d');
+
+ALTER TABLE purchase_report
+    MODIFY `Amount` DECIMAL(18,4) NULL,
+    MODIFY `Rate` DECIMAL(18,4) NULL,
+    MODIFY `Qty` DECIMAL(18,4) NULL,
+    MODIFY `Pending Qty` DECIMAL(18,4) NULL,
+    MODIFY `PO Date` DATE NULL;
+
+SET @add_index = IF(
+    (SELECT COUNT(*) FROM information_schema.STATISTICS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'purchase_report'
+       AND INDEX_NAME = 'idx_purchase_po_date') = 0,
+    'CREATE INDEX idx_purchase_po_date ON purchase_report (`PO Date`)',
+    'DO 0'
+);
+PREPARE add_index FROM @add_index;
+EXECUTE add_index;
+DEALLOCATE PREPARE add_index;
+
+SET SESSION sql_mode = @saved_sql_mode;
@@ -0,0 +1,41 @@
+"""Streamlit table that fetches only the visible page from MySQL."""
+import streamlit as st
+
+from conn import PAGED_TABLES
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def paged_table(db, table, filters=None, key=None):
+    """Render `table` (a key of conn.PAGED_TABLES) one page at a time.
+
+    Sort column, direction, page size and page number are widgets; changing
+    the sort, page size or `filters` goes back to page 1. Returns the frame
+    that was shown.
+    """
+    key = key or table
+    spec = PAGED_TABLES[table]
+    sortable = list(spec["sortable"])
+
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
+    sort = col1.selectbox("Sort by", sortable, index=sortable.index(spec["default_sort"]), key=f"{key}_sort")
+    descending = col2.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Descending"
+    page_size = col3.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+
+    signature = (tuple(sorted((filters or {}).items(), key=lambda item: item[0])), sort, descending, page_size)
+    if st.session_state.get(f"{key}_signature") != signature:
+        st.session_state[f"{key}_signature"] = signature
+        st.session_state[f"{key}_page"] = 1
+    page = col4.number_input("Page", min_value=1, step=1, key=f"{key}_page")
+
+    data, total = db.fetch_page(table, page=page, page_size=page_size, sort=sort,
+                                descending=descending, filters=filters)
+    pages = max(1, -(-total // page_size))
+    if data.empty:
+        st.write(f"No rows on this page; there are {pages:,} page(s)." if total else "No data available.")
+        return data
+    st.dataframe(data, hide_index=True)
+    first = (page - 1) * page_size + 1
+    last = min(page * page_size, total)
+    st.caption(f"Rows {first:,}-{last:,} of {total:,} (page {page:,} of {pages:,})")
+    return data
@@ -1,19 +1,27 @@
 import streamlit as st
 from conn import MySQLDatabase
+from datastore import enable_copy_on_write
+import refresher
+from instrumentation import page_timer
 
 st.title("Client Profiles")
 
 db = MySQLDatabase()
+refresher.start()  # keeps shared data warm in the background (once per process)
+enable_copy_on_write()  # shared data is handed out as shallow copies (see main.py)
 
 # Fetch all clients
-clients = db.fetch_all_clients()['client_name']
+with page_timer("Client Profile", "load"):
+    clients = db.fetch_all_clients()['client_name']
 
 # Select a client
 selected_client = st.selectbox("Select a Client", clients)
 
 if selected_client:
-    # Fetch sales trend
-    client_sales = db.fetch_client_sales(selected_client)
+    # Fetch sales trend, total and summary stats in one round-trip
+    with page_timer("Client Profile", "load profile"):
+        profile = db.fetch_client_profile(selected_client)
+    client_sales = profile['sales']
 
     # Display client sales trend
     if not client_sales.empty:
@@ -22,6 +30,10 @@ if selected_client:
     else:
         st.write("No sales data available for this client.")
 
-    # Display total sales
-    total_sales = db.fetch_client_total_sales(selected_client)
+    # Display total sales and summary stats
+    total_sales = profile['total_sales']
     st.metric("Total Sales", f"Ksh{total_sales:,.2f}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Active Months", f"{profile['first_month'] or '-'} to {profile['last_month'] or '-'}")
+    col2.metric("Average Monthly Sales", f"Ksh{profile['average_monthly_sales']:,.2f}")
+    col3.metric("Year-over-Year", "-" if profile['yoy_change'] is None else f"{profile['yoy_change']:+.1f}%")
@@ -1,19 +1,27 @@
 import streamlit as st
 from conn import MySQLDatabase
+from datastore import enable_copy_on_write
+import refresher
+from instrumentation import page_timer
 
 
 db = MySQLDatabase()
+refresher.start()  # keeps shared data warm in the background (once per process)
+enable_copy_on_write()  # shared data is handed out as shallow copies (see main.py)
 st.title("Salesperson Profiles")
 
 # Fetch all salespersons
-salespersons = db.fetch_all_salespersons()['salesperson_name']
+with page_timer("Sales Person Profile", "load"):
+    salespersons = db.fetch_all_salespersons()['salesperson_name']
 
 # Select a salesperson
 selected_salesperson = st.selectbox("Select a Salesperson", salespersons)
 
 if selected_salesperson:
-    # Fetch sales trend
-    salesperson_sales = db.fetch_salesperson_sales(selected_salesperson)
+    # Fetch sales trend, total and summary stats in one round-trip
+    with page_timer("Sales Person Profile", "load profile"):
+        profile = db.fetch_salesperson_profile(selected_salesperson)
+    salesperson_sales = profile['sales']
 
     # Display salesperson sales trend
     if not salesperson_sales.empty:
@@ -22,6 +30,10 @@ if selected_salesperson:
     else:
         st.write("No sales data available for this salesperson.")
 
-    # Display total sales
-    total_sales = db.fetch_salesperson_total_sales(selected_salesperson)
+    # Display total sales and summary stats
+    total_sales = profile['total_sales']
     st.metric("Total Sales", f"Ksh{total_sales:,.2f}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Active Months", f"{profile['first_month'] or '-'} to {profile['last_month'] or '-'}")
+    col2.metric("Average Monthly Sales", f"Ksh{profile['average_monthly_sales']:,.2f}")
+    col3.metric("Year-over-Year", "-" if profile['yoy_change'] is None else f"{profile['yoy_change']:+.1f}%")
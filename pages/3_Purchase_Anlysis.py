@@ -1,6 +1,9 @@
 import streamlit as st
-import pandas as pd
 from conn import MySQLDatabase
+from datastore import enable_copy_on_write
+import refresher
+from downsampling import downsample_trend
+from instrumentation import page_timer
 import plotly.express as px
 
 # Streamlit App
@@ -8,41 +11,26 @@ st.title("Purchase Analysis Dashboard")
 
 # Initialize Database Connection
 db = MySQLDatabase()
+refresher.start()  # keeps shared data warm in the background (once per process)
+enable_copy_on_write()  # shared data is handed out as shallow copies (see main.py)
 
-# Load Data
-purchase_data = db.load_purchase_data()
-purchase_data['PO Date'] = pd.to_datetime(purchase_data['PO Date'], format='%d-%m-%Y', errors='coerce')
-
-
-
-
-# Data Cleaning: Convert Columns to Appropriate Data Types
-# Handle missing values, remove commas, and ensure numeric columns
-try:
-    purchase_data['PO Date'] = pd.to_datetime(purchase_data['PO Date'], format='%d/%m/%Y', errors='coerce')
-    purchase_data['Amount'] = pd.to_numeric(purchase_data['Amount'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Pending Qty'] = pd.to_numeric(purchase_data['Pending Qty'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Qty'] = pd.to_numeric(purchase_data['Qty'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Rate'] = pd.to_numeric(purchase_data['Rate'].str.replace(',', '', regex=True), errors='coerce')
-except Exception as e:
-    st.error(f"Error during data type conversion: {e}")
-
-# Fill NaN values to avoid issues during calculations
-purchase_data.fillna({'Amount': 0, 'Pending Qty': 0, 'Qty': 0, 'Rate': 0}, inplace=True)
+# Load Data (numeric columns and PO Date arrive already typed, indexed by supplier and item)
+with page_timer("Purchase Analysis", "load"):
+    purchase_index = db.load_purchase_index()
 
 # Filters
-suppliers = purchase_data['Supplier Name'].dropna().unique()
-items = purchase_data['Item Name'].dropna().unique()
+suppliers = purchase_index.values('Supplier Name')
+items = purchase_index.values('Item Name')
 
 selected_supplier = st.sidebar.selectbox("Select Supplier", ["All"] + list(suppliers))
 selected_item = st.sidebar.selectbox("Select Item", ["All"] + list(items))
 
-# Apply Filters
-filtered_data = purchase_data.copy()
-if selected_supplier != "All":
-    filtered_data = filtered_data[filtered_data['Supplier Name'] == selected_supplier]
-if selected_item != "All":
-    filtered_data = filtered_data[filtered_data['Item Name'] == selected_item]
+# Apply Filters (index lookups, "All" means no filter)
+with page_timer("Purchase Analysis", "filter"):
+    filtered_data = purchase_index.select(**{
+        'Supplier Name': None if selected_supplier == "All" else selected_supplier,
+        'Item Name': None if selected_item == "All" else selected_item,
+    })
 
 # KPIs
 st.header("Key Performance Indicators")
@@ -67,38 +55,19 @@ st.header("Purchase Trends Over Time")
 
 if not filtered_data.empty:
     try:
-        # Step 1: Print raw PO Date values before conversion
-       
-
-        # Step 2: Strip any spaces and convert PO Date from string to datetime
-        filtered_data['PO Date'] = (
-            filtered_data['PO Date'].astype(str).str.strip()
-        )
-        filtered_data['PO Date'] = pd.to_datetime(
-            filtered_data['PO Date'], format='%Y-%m-%d', errors='coerce'
-        )
-
-        # Step 3: Drop any invalid dates
-        filtered_data = filtered_data.dropna(subset=['PO Date'])
-
-        # Step 4: Group and sort
-        trend_data = (
-            filtered_data.groupby('PO Date')['Amount']
-            .sum()
-            .reset_index()
-            .sort_values('PO Date')
-        )
-
-        
-
-        # Step 6: Plot
-        fig = px.line(
-            trend_data, 
-            x='PO Date', 
-            y='Amount', 
-            title="Purchase Amount Over Time"
-        )
-        st.plotly_chart(fig)
+        with page_timer("Purchase Analysis", "aggregate"):
+            # Daily, weekly or monthly totals (invalid dates dropped), within the chart's point budget
+            trend_data, granularity = downsample_trend(filtered_data, 'PO Date', 'Amount')
+
+        # Plot
+        with page_timer("Purchase Analysis", "chart"):
+            fig = px.line(
+                trend_data,
+                x='PO Date',
+                y='Amount',
+                title=f"Purchase Amount Over Time ({granularity})"
+            )
+            st.plotly_chart(fig)
 
     except Exception as e:
         st.error(f"Error generating purchase trends: {e}")
@@ -1,35 +1,31 @@
 import streamlit as st
 import plotly.express as px
 from conn import MySQLDatabase
+from datastore import enable_copy_on_write
+import refresher
+from downsampling import downsample_trend
+from instrumentation import page_timer
+from paged_table import paged_table
 import pandas as pd
 
 st.title("Purchase Item Profiles")
 
 # Initialize Database Connection
 db = MySQLDatabase()
+refresher.start()  # keeps shared data warm in the background (once per process)
+enable_copy_on_write()  # shared data is handed out as shallow copies (see main.py)
 
-# Load Data
-purchase_data = db.load_purchase_data()
-
-# Convert Columns to Appropriate Data Types
-try:
-    
-    purchase_data['Amount'] = pd.to_numeric(purchase_data['Amount'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Rate'] = pd.to_numeric(purchase_data['Rate'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Qty'] = pd.to_numeric(purchase_data['Qty'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Pending Qty'] = pd.to_numeric(purchase_data['Pending Qty'].str.replace(',', '', regex=True), errors='coerce')
-except Exception as e:
-    st.error(f"Error during data type conversion: {e}")
-
-# Fill NaN values to avoid issues during calculations
-purchase_data.fillna({'Amount': 0, 'Rate': 0, 'Qty': 0, 'Pending Qty': 0}, inplace=True)
+# Load Data (indexed by supplier and item)
+with page_timer("Item Purchase", "load"):
+    purchase_index = db.load_purchase_index()
 
 # Select Item
-items = purchase_data['Item Name'].dropna().unique()
+items = purchase_index.values('Item Name')
 selected_item = st.selectbox("Select an Item", items)
 
-# Filter data for the selected item
-item_data = purchase_data[purchase_data['Item Name'] == selected_item]
+# Rows for the selected item (index lookup)
+with page_timer("Item Purchase", "filter"):
+    item_data = purchase_index.select(**{'Item Name': selected_item})
 
 # Key Metrics
 st.header(f"Key Metrics for {selected_item}")
@@ -53,9 +49,12 @@ st.markdown(f"<h3 style='font-size:24px;'>Average Rate: <span style='color:green
 st.header(f"Trends for {selected_item}")
 if not item_data.empty:
     try:
-        item_trend = item_data.groupby('PO Date')['Amount'].sum().reset_index()
-        fig = px.line(item_trend, x='PO Date', y='Amount', title=f"Amount Over Time for {selected_item}")
-        st.plotly_chart(fig)
+        with page_timer("Item Purchase", "aggregate"):
+            item_trend, granularity = downsample_trend(item_data, 'PO Date', 'Amount')
+        with page_timer("Item Purchase", "chart"):
+            fig = px.line(item_trend, x='PO Date', y='Amount',
+                          title=f"{granularity} Amount Over Time for {selected_item}")
+            st.plotly_chart(fig)
     except Exception as e:
         st.error(f"Error generating trends: {e}")
 else:
@@ -64,6 +63,6 @@ else:
 # Display Item Data
 st.header("Item Purchase Data")
 try:
-    st.dataframe(item_data)
+    paged_table(db, "purchase_report", filters={'Item Name': selected_item}, key="item_purchases")
 except Exception as e:
     st.error(f"Error displaying item data: {e}")
@@ -1,33 +1,29 @@
 import streamlit as st
 import plotly.express as px
 from conn import MySQLDatabase
+from datastore import enable_copy_on_write
+import refresher
+from downsampling import downsample_trend
+from instrumentation import page_timer
+from paged_table import paged_table
 import pandas as pd
 
 st.title("Supplier Profiles and Comparative Analysis")
 
 # Initialize Database Connection
 db = MySQLDatabase()
-purchase_data = db.load_purchase_data()
-
-# Data Cleaning: Convert Columns to Appropriate Data Types
-try:
-    purchase_data['PO Date'] = pd.to_datetime(purchase_data['PO Date'], format='%d/%m/%Y', errors='coerce')
-    purchase_data['Amount'] = pd.to_numeric(purchase_data['Amount'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Rate'] = pd.to_numeric(purchase_data['Rate'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Qty'] = pd.to_numeric(purchase_data['Qty'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Pending Qty'] = pd.to_numeric(purchase_data['Pending Qty'].str.replace(',', '', regex=True), errors='coerce')
-except Exception as e:
-    st.error(f"Error during data type conversion: {e}")
-
-# Fill NaN values to avoid issues during calculations
-purchase_data.fillna({'Amount': 0, 'Rate': 0, 'Qty': 0, 'Pending Qty': 0}, inplace=True)
+refresher.start()  # keeps shared data warm in the background (once per process)
+enable_copy_on_write()  # shared data is handed out as shallow copies (see main.py)
+with page_timer("Supplier Profile", "load"):
+    purchase_index = db.load_purchase_index()
 
 # Select Supplier
-suppliers = purchase_data['Supplier Name'].dropna().unique()
+suppliers = purchase_index.values('Supplier Name')
 selected_supplier = st.selectbox("Select a Supplier", suppliers)
 
-# Filter data for the selected supplier
-supplier_data = purchase_data[purchase_data['Supplier Name'] == selected_supplier]
+# Rows for the selected supplier (index lookup)
+with page_timer("Supplier Profile", "filter"):
+    supplier_data = purchase_index.select(**{'Supplier Name': selected_supplier})
 
 # Key Metrics
 st.header(f"Key Metrics for {selected_supplier}")
@@ -51,9 +47,12 @@ st.markdown(f"<h3 style='font-size:24px;'>Average Rate: <span style='color:red;'
 st.header(f"Amount Trends for {selected_supplier}")
 if not supplier_data.empty:
     try:
-        supplier_trend = supplier_data.groupby('PO Date')['Amount'].sum().reset_index()
-        fig = px.line(supplier_trend, x='PO Date', y='Amount', title=f"Amount Over Time for {selected_supplier}")
-        st.plotly_chart(fig)
+        with page_timer("Supplier Profile", "aggregate trend"):
+            supplier_trend, granularity = downsample_trend(supplier_data, 'PO Date', 'Amount')
+        with page_timer("Supplier Profile", "chart trend"):
+            fig = px.line(supplier_trend, x='PO Date', y='Amount',
+                          title=f"{granularity} Amount Over Time for {selected_supplier}")
+            st.plotly_chart(fig)
     except Exception as e:
         st.error(f"Error generating amount trends: {e}")
 else:
@@ -66,14 +65,11 @@ comparison_metric = st.selectbox(
     ["Total Amount", "Total Quantity", "Average Rate"]
 )
 
-if not purchase_data.empty:
+if not purchase_index.frame.empty:
     try:
-        # Aggregate data by supplier
-        supplier_comparison = purchase_data.groupby('Supplier Name').agg(
-            total_amount=('Amount', 'sum'),
-            total_qty=('Qty', 'sum'),
-            avg_rate=('Rate', 'mean')
-        ).reset_index()
+        # Totals by supplier (precomputed once per data version, kept warm in the background)
+        with page_timer("Supplier Profile", "aggregate comparison"):
+            supplier_comparison = db.load_supplier_comparison()
 
         # Select metric for comparison
         if comparison_metric == "Total Amount":
@@ -110,6 +106,6 @@ else:
 # Display Supplier Data
 st.header("Supplier Purchase Data")
 try:
-    st.dataframe(supplier_data)
+    paged_table(db, "purchase_report", filters={'Supplier Name': selected_supplier}, key="supplier_purchases")
 except Exception as e:
     st.error(f"Error displaying supplier data: {e}")
@@ -1,29 +1,29 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from conn import MySQLDatabase
+from conn import MySQLDatabase, supplier_comparison as compare_suppliers
+from datastore import enable_copy_on_write
+import refresher
+from downsampling import downsample_trend
+from instrumentation import page_timer
 
 st.title("Enhanced Supplier Comparisons")
 
 # Initialize Database Connection
 db = MySQLDatabase()
-purchase_data = db.load_purchase_data()
+refresher.start()  # keeps shared data warm in the background (once per process)
+enable_copy_on_write()  # shared data is handed out as shallow copies (see main.py)
 
-# Data Cleaning: Convert Columns to Appropriate Data Types
-try:
-    purchase_data['PO Date'] = pd.to_datetime(purchase_data['PO Date'], format='%d/%m/%Y', errors='coerce')
-    purchase_data['Amount'] = pd.to_numeric(purchase_data['Amount'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Rate'] = pd.to_numeric(purchase_data['Rate'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Qty'] = pd.to_numeric(purchase_data['Qty'].str.replace(',', '', regex=True), errors='coerce')
-    purchase_data['Pending Qty'] = pd.to_numeric(purchase_data['Pending Qty'].str.replace(',', '', regex=True), errors='coerce')
-except Exception as e:
-    st.error(f"Error during data type conversion: {e}")
-
-# Fill NaN values to avoid issues during calculations
-purchase_data.fillna({'Amount': 0, 'Rate': 0, 'Qty': 0, 'Pending Qty': 0}, inplace=True)
+# Load purchases and the monthly sales trend in parallel
+with page_timer("Supplier Comparison", "load"):
+    results = db.run_concurrently({
+        "purchase_data": db.load_clean_purchase_data,
+        "sales_trend": db.fetch_monthly_sales_trend,
+    })
+purchase_data = results['purchase_data']
 
 # Sidebar: Supplier Comparison Configuration
-suppliers = purchase_data['Supplier Name'].dropna().unique()
+suppliers = list(purchase_data['Supplier Name'].dropna().unique())
 selected_suppliers = st.sidebar.multiselect("Select Suppliers to Compare", suppliers, default=suppliers[:3])
 
 comparison_metric = st.sidebar.selectbox(
@@ -37,25 +37,16 @@ start_date, end_date = st.sidebar.date_input(
 )
 
 # Filter data by selected suppliers and date range
-filtered_data = purchase_data[
-    (purchase_data['Supplier Name'].isin(selected_suppliers)) &
-    (purchase_data['PO Date'] >= pd.to_datetime(start_date)) &
-    (purchase_data['PO Date'] <= pd.to_datetime(end_date))
-]
+with page_timer("Supplier Comparison", "filter"):
+    filtered_data = purchase_data[
+        (purchase_data['Supplier Name'].isin(selected_suppliers)) &
+        (purchase_data['PO Date'] >= pd.to_datetime(start_date)) &
+        (purchase_data['PO Date'] <= pd.to_datetime(end_date))
+    ]
 
 # Aggregated Metrics by Supplier
-supplier_comparison = filtered_data.groupby('Supplier Name').agg(
-    total_amount=('Amount', 'sum'),
-    total_qty=('Qty', 'sum'),
-    avg_rate=('Rate', 'mean'),
-    total_pending_qty=('Pending Qty', 'sum')
-).reset_index()
-
-# Calculate additional metrics
-supplier_comparison['fulfillment_rate'] = (
-    (supplier_comparison['total_qty'] - supplier_comparison['total_pending_qty']) /
-    supplier_comparison['total_qty'] * 100
-).fillna(0)
+with page_timer("Supplier Comparison", "aggregate comparison"):
+    supplier_comparison = compare_suppliers(filtered_data)
 
 # Generate Comparative Chart
 st.header("Supplier-Wise Comparative Analysis")
@@ -104,16 +95,20 @@ else:
 st.header("Supplier Trends Over Time")
 if not filtered_data.empty:
     try:
-        supplier_trends = filtered_data.groupby(['Supplier Name', 'PO Date']).agg(
-            total_amount=('Amount', 'sum')
-        ).reset_index()
+        with page_timer("Supplier Comparison", "aggregate trends"):
+            # Per-supplier totals at a granularity that fits the selected range in the point budget
+            supplier_trends, granularity = downsample_trend(
+                filtered_data.rename(columns={'Amount': 'total_amount'}),
+                'PO Date', 'total_amount', group_column='Supplier Name',
+                start=start_date, end=end_date,
+            )
 
         fig = px.line(
             supplier_trends,
             x='PO Date',
             y='total_amount',
             color='Supplier Name',
-            title="Supplier Trends Over Time",
+            title=f"Supplier Trends Over Time ({granularity})",
             labels={'total_amount': 'Total Amount (Ksh)', 'PO Date': 'Date'}
         )
         st.plotly_chart(fig)
@@ -124,18 +119,12 @@ else:
 
 # Monthly Sales Trends
 st.header("Monthly Sales Trends")
-sales_data = db.load_sales_data()
-filtered_data = sales_data.copy()
-
-if not filtered_data.empty:
-    sales_trend = filtered_data.groupby('month_year')['total_amount'].sum().reset_index()
+sales_trend = results['sales_trend']
 
-    # Correct parsing of `month_year` in the format `YY-MMM` (e.g., 23-Apr)
-    sales_trend['month_year'] = pd.to_datetime(sales_trend['month_year'], format='%y-%b')
-    
-    # Sort by parsed dates
-    sales_trend = sales_trend.sort_values('month_year')
-    fig = px.line(sales_trend, x='month_year', y='total_amount', title="Sales Over Time")
+if not sales_trend.empty:
+    # `period` is the first day of each month, already sorted by the query
+    fig = px.line(sales_trend, x='period', y='total_amount', title="Sales Over Time",
+                  labels={'period': 'month_year'})
     st.plotly_chart(fig)
 else:
-    st.write("No data available for the selected filters.")
\ No newline at end of file
+    st.write("No data available for the selected filters.")
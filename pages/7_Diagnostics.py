@@ -0,0 +1,106 @@
+import json
+import time
+
+import pandas as pd
+
+import streamlit as st
+from conn import MySQLDatabase
+from datastore import enable_copy_on_write
+from instrumentation import SLOW_QUERY_LOG, SLOW_QUERY_SECONDS, recorder
+import refresher
+
+st.title("Diagnostics")
+
+db = MySQLDatabase()
+refresher.start()
+enable_copy_on_write()  # shared data is handed out as shallow copies (see main.py)
+
+# Query latency (every query this server process has run, most recent samples)
+st.header("Queries")
+query_stats = recorder.query_stats()
+if not query_stats.empty:
+    st.dataframe(query_stats, hide_index=True)
+else:
+    st.write("No queries recorded yet.")
+
+# Page section timings
+st.header("Page Sections")
+section_stats = recorder.section_stats()
+if not section_stats.empty:
+    st.dataframe(section_stats, hide_index=True)
+else:
+    st.write("No page timings recorded yet.")
+
+# Slow queries
+st.header(f"Slow Queries (>= {SLOW_QUERY_SECONDS:g}s)")
+slow_queries = recorder.slow_queries()
+if not slow_queries.empty:
+    st.dataframe(slow_queries, hide_index=True)
+    if SLOW_QUERY_LOG:
+        st.caption(f"Also logged to {SLOW_QUERY_LOG}")
+else:
+    st.write("No slow queries recorded.")
+
+# Failed queries (most recent, with the error the database returned)
+st.header("Failed Queries")
+failed_queries = recorder.failed_queries()
+if not failed_queries.empty:
+    st.dataframe(failed_queries, hide_index=True)
+else:
+    st.write("No failed queries recorded.")
+
+# Shared datasets (one copy per server process, see datastore.py)
+st.header("Shared Datasets")
+dataset_stats = db.dataset_stats()
+if not dataset_stats.empty:
+    st.metric("Memory held", f"{dataset_stats['bytes'].sum() / 1024 / 1024:,.1f} MB")
+    st.dataframe(dataset_stats, hide_index=True)
+else:
+    st.write("No datasets loaded yet.")
+
+# Background refresh (see refresher.py)
+st.header("Background Refresh")
+running = refresher.get()
+if running is not None:
+    status = running.status()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Runs", status["runs"])
+    col2.metric("Last Refresh", "-" if status["last_refresh_at"] is None
+                else time.strftime("%H:%M:%S", time.localtime(status["last_refresh_at"])))
+    col3.metric("Last Duration", "-" if status["last_duration_s"] is None else f"{status['last_duration_s']:.1f}s")
+    col4.metric("Failures", status["failures"])
+    st.caption(f"Last reason: {status['last_reason'] or '-'}; runs every {status['interval_s']}s and when "
+               f"tables change (checked every {status['poll_interval_s']}s); thread alive: {status['alive']}")
+    st.dataframe(pd.DataFrame.from_dict(status["jobs"], orient="index").rename_axis("job").reset_index(),
+                 hide_index=True)
+    if st.button("Refresh now"):
+        running.request()
+        st.toast("Refresh requested")
+else:
+    st.write("The background refresher is disabled (refresher.REFRESH_ENABLED).")
+
+# Connection pool and result cache
+st.header("Connection Pool and Cache")
+col1, col2 = st.columns(2)
+col1.subheader("Pool")
+col1.json(db.pool_stats())
+col2.subheader("Query Cache")
+col2.json(db.cache_stats())
+
+# Export
+st.header("Export")
+st.download_button(
+    "Download samples (JSON)",
+    json.dumps(recorder.export(), default=str, indent=2),
+    file_name="diagnostics.json",
+    mime="application/json",
+)
+if not query_stats.empty:
+    st.download_button("Download query percentiles (CSV)", query_stats.to_csv(index=False),
+                       file_name="query_stats.csv", mime="text/csv")
+if not section_stats.empty:
+    st.download_button("Download page percentiles (CSV)", section_stats.to_csv(index=False),
+                       file_name="page_stats.csv", mime="text/csv")
+if st.button("Reset measurements"):
+    recorder.clear()
+    st.rerun()
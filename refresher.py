@@ -0,0 +1,138 @@
+"""Background thread that keeps the dashboard's data and aggregates warm.
+
+Every REFRESH_POLL_INTERVAL seconds the refresher probes the source tables;
+when one has changed, or REFRESH_INTERVAL has passed since the last run, it
+runs every job in JOBS. Jobs call the same MySQLDatabase loaders the pages
+use, so the shared datasets (datastore.py) and cached query results are
+rebuilt for the new data version and swapped in before a user asks for them.
+Pages call start() on load; only the first call starts the thread.
+"""
+import threading
+import time
+import traceback
+
+from conn import MySQLDatabase
+
+REFRESH_ENABLED = True
+REFRESH_INTERVAL = 600       # seconds between unconditional runs (matches the query cache TTL)
+REFRESH_POLL_INTERVAL = 30   # seconds between table-change probes
+WATCHED_TABLES = ("sales_by_person", "purchase_report")
+
+# (job name, function of a MySQLDatabase); the defaults are the unfiltered views the pages open with
+JOBS = [
+    ("purchase data", lambda db: (db.load_clean_purchase_data(), db.load_purchase_index())),
+    ("supplier comparison", lambda db: db.load_supplier_comparison()),
+    ("sales filter options", lambda db: (db.fetch_sales_filter_options(), db.fetch_all_clients(),
+                                         db.fetch_all_salespersons())),
+    ("monthly sales trend", lambda db: db.fetch_monthly_sales_trend()),
+    ("top salespersons and clients", lambda db: (db.fetch_top_salespersons(), db.fetch_top_clients())),
+]
+
+
+class Refresher(threading.Thread):
+    def __init__(self, interval=REFRESH_INTERVAL, poll_interval=REFRESH_POLL_INTERVAL):
+        super().__init__(name="dashboard-refresher", daemon=True)
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._versions = None
+        self._last_run = None
+        self._status = {
+            "started_at": time.time(),
+            "runs": 0,
+            "last_refresh_at": None,
+            "last_duration_s": None,
+            "last_reason": None,
+            "failures": 0,
+            "jobs": {name: {"last_success_at": None, "duration_s": None, "failures": 0, "last_error": None}
+                     for name, _ in JOBS},
+        }
+
+    def run(self):
+        db = MySQLDatabase()
+        requested = False
+        while True:
+            try:
+                reason = "requested" if requested else self._due(db)
+                if reason:
+                    self.refresh(db, reason)
+            except Exception:
+                traceback.print_exc()
+            requested = self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _due(self, db):
+        """Why a refresh should run now, or None."""
+        versions = db.table_versions(WATCHED_TABLES)
+        if self._last_run is None:
+            self._versions = versions
+            return "startup"
+        if versions is not None and versions != self._versions:
+            self._versions = versions
+            return "data changed"
+        if time.monotonic() - self._last_run >= self.interval:
+            return "schedule"
+        return None
+
+    def refresh(self, db, reason):
+        """Run every job once, recording duration and failures per job."""
+        start = time.perf_counter()
+        failed = 0
+        for name, job in JOBS:
+            job_start = time.perf_counter()
+            try:
+                job(db)
+            except Exception as e:
+                failed += 1
+                with self._lock:
+                    status = self._status["jobs"][name]
+                    status["failures"] += 1
+                    status["last_error"] = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+                continue
+            with self._lock:
+                status = self._status["jobs"][name]
+                status["last_success_at"] = time.time()
+                status["duration_s"] = time.perf_counter() - job_start
+        self._last_run = time.monotonic()
+        with self._lock:
+            self._status["runs"] += 1
+            self._status["failures"] += failed
+            self._status["last_refresh_at"] = time.time()
+            self._status["last_duration_s"] = time.perf_counter() - start
+            self._status["last_reason"] = reason
+
+    def request(self):
+        """Ask for a refresh as soon as the thread wakes up."""
+        self._wake.set()
+
+    def status(self):
+        with self._lock:
+            status = dict(self._status)
+            status["jobs"] = {name: dict(job) for name, job in self._status["jobs"].items()}
+        status["interval_s"] = self.interval
+        status["poll_interval_s"] = self.poll_interval
+        status["alive"] = self.is_alive()
+        return status
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start():
+    """Start the process-wide refresher if it is enabled and not running yet; returns it."""
+    global _refresher
+    if not REFRESH_ENABLED:
+        return None
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = Refresher()
+            _refresher.start()
+        return _refresher
+
+
+def get():
+    """The running refresher, or None."""
+    return _refresher
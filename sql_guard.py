@@ -0,0 +1,169 @@
+"""Checks applied to LLM-generated SQL before it reaches the database or a prompt.
+
+run_guarded() only lets single read-only statements through, rejects queries
+whose EXPLAIN estimate exceeds MAX_ESTIMATED_ROWS, caps the rows returned with
+a LIMIT, runs them under a server-side statement timeout (lifted again once
+the query has run) and condenses large results to a row count, a head and
+per-column aggregates. Database errors, including the timeout, come back as
+QueryFailed.
+"""
+import re
+from contextlib import contextmanager
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+MAX_ESTIMATED_ROWS = 5_000_000  # rows MySQL expects to examine, per EXPLAIN
+MAX_RESULT_ROWS = 1000          # LIMIT enforced on every query
+STATEMENT_TIMEOUT_MS = 15_000   # server-side execution limit
+PROMPT_ROWS = 50                # results up to this size go into the prompt verbatim
+PROMPT_HEAD_ROWS = 20           # rows shown when a result is summarised
+
+READ_ONLY_START = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+# Anything that writes, changes the schema or session, locks or reads server files; checked outside quotes
+WRITE_KEYWORDS = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|REPLACE(?!\s*\()|MERGE|UPSERT|CREATE|ALTER|DROP|TRUNCATE|RENAME|GRANT|REVOKE|"
+    r"CALL|DO|HANDLER|LOAD|LOCK|UNLOCK|SET|INTO|OUTFILE|DUMPFILE|SHUTDOWN|KILL|FLUSH|RESET|PURGE|"
+    r"ANALYZE|OPTIMIZE|REPAIR|INSTALL|UNINSTALL|PREPARE|EXECUTE|DEALLOCATE|SLEEP|BENCHMARK|GET_LOCK|LOAD_FILE)\b",
+    re.IGNORECASE,
+)
+QUOTED = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`[^`]*`")
+TIMEOUT_ERRORS = (3024, 1969)  # MySQL MAX_EXECUTION_TIME, MariaDB max_statement_time
+TRAILING_LIMIT = re.compile(
+    r"\bLIMIT\s+(\d+)(?:\s*,\s*(\d+)|\s+OFFSET\s+\d+)?\s*$", re.IGNORECASE
+)
+
+
+class QueryRejected(Exception):
+    """Raised when generated SQL is not safe or cheap enough to run."""
+
+
+class QueryFailed(Exception):
+    """Raised when the database could not run generated SQL (bad SQL, timeout, lost connection)."""
+
+
+def strip_sql(sql):
+    """Remove comments, surrounding whitespace, backticks the model added and the trailing semicolon."""
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    sql = re.sub(r"(--|#)[^\n]*", " ", sql)
+    sql = sql.strip().strip("`").strip()
+    sql = re.sub(r"^sql\s+", "", sql, flags=re.IGNORECASE)
+    return sql.rstrip("; \n\t")
+
+
+def check_read_only(sql):
+    """Reject anything but a single SELECT (or WITH ... SELECT) that reads only.
+
+    String literals and quoted identifiers are blanked first, so a keyword
+    inside them does not count; one outside them, e.g. WITH x AS (...) DELETE
+    or SELECT ... INTO OUTFILE, is rejected.
+    """
+    unquoted = QUOTED.sub("''", sql)
+    if ";" in unquoted:
+        raise QueryRejected("only a single statement may be run")
+    if not READ_ONLY_START.match(unquoted):
+        raise QueryRejected("only SELECT queries may be run")
+    keyword = WRITE_KEYWORDS.search(unquoted)
+    if keyword is not None:
+        raise QueryRejected(f"only read-only queries may be run (found {keyword.group(1).upper()})")
+
+
+def enforce_limit(sql, max_rows=MAX_RESULT_ROWS):
+    """Append a LIMIT, or lower an existing trailing one, so at most `max_rows` come back."""
+    match = TRAILING_LIMIT.search(sql)
+    if match is None:
+        return f"{sql} LIMIT {max_rows}"
+    count = int(match.group(2) or match.group(1))
+    if count <= max_rows:
+        return sql
+    if match.group(2):
+        return sql[:match.start()] + f"LIMIT {match.group(1)}, {max_rows}"
+    return sql[:match.start(1)] + str(max_rows) + sql[match.end(1):]
+
+
+def estimate_rows(conn, sql):
+    """Rows MySQL expects to examine: the product of EXPLAIN rows per SELECT, summed."""
+    plan = pd.read_sql("EXPLAIN " + sql, conn)
+    plan.columns = [c.lower() for c in plan.columns]
+    if plan.empty or "rows" not in plan.columns:
+        return 0
+    rows = pd.to_numeric(plan["rows"], errors="coerce").fillna(1).clip(lower=1)
+    return int(rows.groupby(plan["id"].fillna(0)).prod().sum())
+
+
+@contextmanager
+def statement_timeout(conn, timeout_ms=STATEMENT_TIMEOUT_MS):
+    """Limit execution time of the statements run inside the block, on MySQL or MariaDB.
+
+    The session's previous limit is restored afterwards, because the pooled
+    connection goes back to an engine that SQLDatabase shares. If it cannot be
+    restored the connection is invalidated instead of being reused.
+    """
+    version = conn.execute(text("SELECT VERSION()")).scalar() or ""
+    if "mariadb" in version.lower():
+        variable, value = "max_statement_time", f"{timeout_ms / 1000:.3f}"
+    else:
+        variable, value = "MAX_EXECUTION_TIME", str(int(timeout_ms))
+    previous = conn.execute(text(f"SELECT @@SESSION.{variable}")).scalar()
+    conn.execute(text(f"SET SESSION {variable} = {value}"))
+    try:
+        yield
+    finally:
+        try:
+            conn.execute(text(f"SET SESSION {variable} = {previous}"))
+        except SQLAlchemyError:
+            conn.invalidate()
+
+
+def summarise_result(data, limit_hit=False):
+    """Text for the answer prompt: the rows themselves, or a summary of a large result."""
+    if data.empty:
+        return "The query returned no rows."
+    if len(data) <= PROMPT_ROWS:
+        return data.to_csv(index=False)
+
+    count = f"{len(data)}+ (stopped at the row limit)" if limit_hit else str(len(data))
+    parts = [
+        f"Rows returned: {count}",
+        f"First {PROMPT_HEAD_ROWS} rows:",
+        data.head(PROMPT_HEAD_ROWS).to_csv(index=False),
+    ]
+    numeric = data.select_dtypes("number")
+    if not numeric.empty:
+        parts.append("Aggregates over all returned rows:")
+        parts.append(numeric.agg(["sum", "mean", "min", "max"]).to_csv())
+    for column in data.select_dtypes(exclude="number").columns:
+        parts.append(f"{column}: {data[column].nunique()} distinct values")
+    return "\n".join(parts)
+
+
+def run_guarded(engine, sql):
+    """Check, bound and run generated SQL; returns the prompt-ready result text.
+
+    Raises QueryRejected if the statement is not a single read-only SELECT or
+    its estimated cost is over budget, and QueryFailed with a message for the
+    user if the database returns an error or the statement times out.
+    """
+    sql = strip_sql(sql)
+    check_read_only(sql)
+    # One row over the limit tells a result of exactly MAX_RESULT_ROWS from a truncated one
+    bounded = enforce_limit(sql, MAX_RESULT_ROWS + 1)
+    try:
+        with engine.connect() as conn:
+            estimated = estimate_rows(conn, bounded)
+            if estimated > MAX_ESTIMATED_ROWS:
+                raise QueryRejected(
+                    f"it would examine about {estimated:,} rows (limit {MAX_ESTIMATED_ROWS:,}); "
+                    "ask for an aggregate or a narrower filter"
+                )
+            with statement_timeout(conn):
+                data = pd.read_sql(bounded, conn)
+    except SQLAlchemyError as e:
+        if getattr(getattr(e, "orig", None), "errno", None) in TIMEOUT_ERRORS:
+            raise QueryFailed(
+                f"it ran longer than {STATEMENT_TIMEOUT_MS / 1000:g}s; ask for an aggregate or a narrower filter"
+            ) from e
+        raise QueryFailed(f"the database returned an error: {getattr(e, 'orig', None) or e}") from e
+    limit_hit = len(data) > MAX_RESULT_ROWS
+    return summarise_result(data.head(MAX_RESULT_ROWS), limit_hit=limit_hit)